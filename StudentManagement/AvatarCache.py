@@ -0,0 +1,93 @@
+import base64
+import hashlib
+from collections import OrderedDict
+
+from PyQt6.QtCore import QSize, Qt
+from PyQt6.QtGui import QImage, QPixmap
+
+THUMBNAIL_SIZE = QSize(300, 200)
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+# leading bytes of the image formats QImage reads
+IMAGE_SIGNATURES = (b"\x89PNG", b"\xff\xd8\xff", b"GIF8", b"BM", b"RIFF", b"II*\x00", b"MM\x00*")
+
+
+def decode_avatar(data):
+    """Return the image bytes of a stored avatar.
+
+    Avatars are stored as raw BLOBs; rows written before the switch hold
+    base64 text, which is decoded here until migrate_avatars.py has run.
+    """
+    if isinstance(data, str):
+        data = data.encode("ascii")
+    data = bytes(data)
+    if data.startswith(IMAGE_SIGNATURES):
+        return data
+    try:
+        return base64.b64decode(data, validate=True)
+    except ValueError:
+        return data
+
+
+def avatar_hash(data):
+    """MD5 hex of the stored avatar bytes (what MySQL's MD5(Avatar) returns), or None for no avatar.
+
+    Kept in student.AvatarHash so selecting a student never reads the blob.
+    """
+    if data is None:
+        return None
+    return hashlib.md5(bytes(data)).hexdigest()
+
+
+def make_thumbnail(data, size=THUMBNAIL_SIZE):
+    """Decode a stored avatar into a QImage scaled to fit `size`, or None if unreadable.
+
+    Only QImage is used here, so this may run on a worker thread; the GUI
+    thread turns the result into a QPixmap.
+    """
+    image = QImage()
+    if not image.loadFromData(decode_avatar(data)):
+        return None
+    if image.width() > size.width() or image.height() > size.height():
+        image = image.scaled(size, Qt.AspectRatioMode.KeepAspectRatio,
+                             Qt.TransformationMode.SmoothTransformation)
+    return image
+
+
+class AvatarCache:
+    """LRU cache of avatar thumbnails keyed by (student ID, avatar hash).
+
+    The hash is part of the key, so a changed avatar is never served stale.
+    Entries are evicted oldest-first once their pixel data exceeds `max_bytes`.
+    """
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+
+    @staticmethod
+    def cost(pixmap):
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def get(self, student_id, avatar_hash):
+        pixmap = self.entries.get((student_id, avatar_hash))
+        if pixmap is not None:
+            self.entries.move_to_end((student_id, avatar_hash))
+        return pixmap
+
+    def put(self, student_id, avatar_hash, image):
+        """Store a thumbnail QImage (see make_thumbnail) and return it as a QPixmap."""
+        pixmap = QPixmap.fromImage(image)
+        self.discard(student_id)
+        if self.cost(pixmap) > self.max_bytes:
+            return pixmap
+        self.entries[(student_id, avatar_hash)] = pixmap
+        self.total_bytes += self.cost(pixmap)
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= self.cost(evicted)
+        return pixmap
+
+    def discard(self, student_id):
+        """Drop every thumbnail of `student_id` (its avatar changed or it was removed)."""
+        for key in [k for k in self.entries if k[0] == student_id]:
+            self.total_bytes -= self.cost(self.entries.pop(key))
@@ -0,0 +1,110 @@
+import threading
+import traceback
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+
+class DbTaskSignals(QObject):
+    # (task id, result) / (task id, exception)
+    result = pyqtSignal(int, object)
+    error = pyqtSignal(int, object)
+
+
+class DbTask(QRunnable):
+    """Run fn(conn, *args) on a pool thread with a borrowed DB connection."""
+    def __init__(self, task_id, db, fn, args):
+        super().__init__()
+        self.task_id = task_id
+        self.db = db
+        self.fn = fn
+        self.args = args
+        self.cancelled = threading.Event()
+        self.signals = DbTaskSignals()
+
+    def run(self):
+        if self.cancelled.is_set():
+            # superseded while still queued: do not touch the database at all
+            return
+        try:
+            with self.db.connection() as conn:
+                result = self.fn(conn, *self.args)
+        except Exception as e:
+            self.signals.error.emit(self.task_id, e)
+        else:
+            self.signals.result.emit(self.task_id, result)
+
+
+class DbWorker(QObject):
+    """Runs database calls off the GUI thread and hands results back on it.
+
+    submit(fn, *args) queues fn(conn, *args) on a QThreadPool; `on_result`
+    and `on_error` are then called on the GUI thread, so they may touch
+    widgets while `fn` must not. Tasks submitted with the same `channel`
+    supersede each other: a queued older task is dropped before it runs and
+    the result of one already running is ignored, so only the latest request
+    (e.g. the last row clicked) ever reaches the UI.
+    """
+    def __init__(self, db, max_threads=4, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.next_id = 0
+        self.callbacks = {}
+        self.latest = {}
+        self.tokens = {}
+
+    def submit(self, fn, *args, on_result=None, on_error=None, channel=None):
+        self.next_id += 1
+        task_id = self.next_id
+        task = DbTask(task_id, self.db, fn, args)
+        task.signals.result.connect(self.onResult)
+        task.signals.error.connect(self.onError)
+        if channel is not None:
+            self.cancel(channel)
+            self.latest[channel] = task_id
+            self.tokens[channel] = task.cancelled
+        self.callbacks[task_id] = (on_result, on_error, channel)
+        self.pool.start(task)
+        return task_id
+
+    def cancel(self, channel):
+        """Forget the pending task of `channel`; its result will never be delivered."""
+        task_id = self.latest.pop(channel, None)
+        token = self.tokens.pop(channel, None)
+        if token is not None:
+            token.set()
+        if task_id is not None:
+            self.callbacks.pop(task_id, None)
+
+    def isBusy(self, channel):
+        return channel in self.latest
+
+    def waitForDone(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
+
+    def take(self, task_id):
+        on_result, on_error, channel = self.callbacks.pop(task_id, (None, None, None))
+        if channel is not None and self.latest.get(channel) == task_id:
+            del self.latest[channel]
+            del self.tokens[channel]
+        return on_result, on_error
+
+    @pyqtSlot(int, object)
+    def onResult(self, task_id, result):
+        if task_id not in self.callbacks:
+            # superseded by a newer task on the same channel
+            return
+        on_result, _ = self.take(task_id)
+        if on_result is not None:
+            on_result(result)
+
+    @pyqtSlot(int, object)
+    def onError(self, task_id, error):
+        if task_id not in self.callbacks:
+            return
+        _, on_error = self.take(task_id)
+        if on_error is not None:
+            on_error(error)
+        else:
+            traceback.print_exception(error)
@@ -25,25 +25,17 @@ class Ui_MainWindow(object):
         self.groupBox_3.setObjectName("groupBox_3")
         self.verticalLayout_table = QtWidgets.QVBoxLayout(self.groupBox_3)
         self.verticalLayout_table.setObjectName("verticalLayout_table")
-        self.tableWidgetStudent = QtWidgets.QTableWidget(parent=self.groupBox_3)
-        self.tableWidgetStudent.setAlternatingRowColors(True)
-        self.tableWidgetStudent.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
-        self.tableWidgetStudent.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
-        self.tableWidgetStudent.setColumnCount(4)
-        self.tableWidgetStudent.setRowCount(0)
-        self.tableWidgetStudent.setObjectName("tableWidgetStudent")
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidgetStudent.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidgetStudent.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidgetStudent.setHorizontalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidgetStudent.setHorizontalHeaderItem(3, item)
-        self.tableWidgetStudent.horizontalHeader().setCascadingSectionResizes(True)
-        self.tableWidgetStudent.horizontalHeader().setDefaultSectionSize(160)
-        self.tableWidgetStudent.horizontalHeader().setStretchLastSection(True)
-        self.verticalLayout_table.addWidget(self.tableWidgetStudent)
+        self.tableViewStudent = QtWidgets.QTableView(parent=self.groupBox_3)
+        self.tableViewStudent.setAlternatingRowColors(True)
+        self.tableViewStudent.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
+        self.tableViewStudent.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.tableViewStudent.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.tableViewStudent.setSortingEnabled(True)
+        self.tableViewStudent.setObjectName("tableViewStudent")
+        self.tableViewStudent.horizontalHeader().setCascadingSectionResizes(True)
+        self.tableViewStudent.horizontalHeader().setDefaultSectionSize(160)
+        self.tableViewStudent.horizontalHeader().setStretchLastSection(True)
+        self.verticalLayout_table.addWidget(self.tableViewStudent)
         self.verticalLayout_root.addWidget(self.groupBox_3)
         self.groupBox_2 = QtWidgets.QGroupBox(parent=self.centralwidget)
         self.groupBox_2.setObjectName("groupBox_2")
@@ -145,15 +137,6 @@ class Ui_MainWindow(object):
         MainWindow.setWindowTitle(_translate("MainWindow", "Student Management"))
         self.label.setText(_translate("MainWindow", "<h1>Student Management</h1>"))
         self.groupBox_3.setTitle(_translate("MainWindow", "List of Students:"))
-        self.tableWidgetStudent.setSortingEnabled(True)
-        item = self.tableWidgetStudent.horizontalHeaderItem(0)
-        item.setText(_translate("MainWindow", "ID"))
-        item = self.tableWidgetStudent.horizontalHeaderItem(1)
-        item.setText(_translate("MainWindow", "Code"))
-        item = self.tableWidgetStudent.horizontalHeaderItem(2)
-        item.setText(_translate("MainWindow", "Name"))
-        item = self.tableWidgetStudent.horizontalHeaderItem(3)
-        item.setText(_translate("MainWindow", "Age"))
         self.groupBox_2.setTitle(_translate("MainWindow", "Student Details:"))
         self.label_2.setText(_translate("MainWindow", "ID:"))
         self.label_3.setText(_translate("MainWindow", "Code:"))
@@ -1,9 +1,14 @@
-import base64
 import traceback
-import mysql.connector
+from PyQt6.QtCore import QSortFilterProxyModel, Qt, QTimer
 from PyQt6.QtGui import QPixmap
-from PyQt6.QtWidgets import QTableWidgetItem, QFileDialog, QMessageBox
+from PyQt6.QtWidgets import QFileDialog, QMessageBox
+from AvatarCache import AvatarCache, avatar_hash, make_thumbnail
+from DbWorker import DbWorker
 from MainWindow import Ui_MainWindow
+from StudentSync import latest_version, read_changes
+from StudentTableModel import StudentTableModel
+from migrate_avatars import has_avatar_hash_column
+from connectors.mysql_pool import PooledConnector
 
 class MainWindowEx(Ui_MainWindow):
     def __init__(self):
@@ -14,16 +19,30 @@ class MainWindowEx(Ui_MainWindow):
         self.name = None
         self.age = None
         self.avatar = None
+        self.avatarHash = None
+        # only a picked/removed avatar is written back; otherwise the stored one is kept
+        self.avatarChanged = False
+        # whether student.AvatarHash exists (None: not checked yet); the app also runs before migrate_avatars.py
+        self.avatarHashColumn = None
         self.intro = None
+        self.model = None
+        self.proxy = None
+        self.avatarCache = AvatarCache()
+        self.worker = None
+        # last student_change Version applied to the grid
+        self.syncVersion = None
     def setupUi(self, MainWindow):
         super().setupUi(MainWindow)
         self.MainWindow=MainWindow
-        self.tableWidgetStudent.itemSelectionChanged.connect(self.processItemSelection)
         self.pushButtonAvatar.clicked.connect(self.pickAvatar)
         self.pushButtonRemoveAvatar.clicked.connect(self.removeAvatar)
         self.pushButtonInsert.clicked.connect(self.processInsert)
         self.pushButtonUpdate.clicked.connect(self.processUpdate)
         self.pushButtonRemove.clicked.connect(self.processRemove)
+        # poll the change log so edits made by other clients show up
+        self.syncTimer = QTimer(MainWindow)
+        self.syncTimer.setInterval(5000)
+        self.syncTimer.timeout.connect(self.syncChanges)
     def show(self):
         self.MainWindow.show()
     def connectMySQL(self):
@@ -33,77 +52,138 @@ class MainWindowEx(Ui_MainWindow):
         username = "root"
         password = "@Obama123"
 
-        self.conn = mysql.connector.connect(
-            host=server,
+        self.db = PooledConnector(
+            server=server,
             port=port,
             database=database,
-            user=username,
+            username=username,
             password=password)
+        # every DB call below runs on this worker, never on the GUI thread
+        self.worker = DbWorker(self.db, max_threads=self.db.pool_size)
+        # checked once at startup
+        try:
+            with self.db.connection() as conn:
+                self.hasAvatarHashColumn(conn)
+        except Exception:
+            traceback.print_exc()
+    def hasAvatarHashColumn(self, conn):
+        if self.avatarHashColumn == None:
+            self.avatarHashColumn = has_avatar_hash_column(conn)
+        return self.avatarHashColumn
     def selectAllStudent(self):
-        cursor = self.conn.cursor()
-        # query all students
-        sql = "select * from student"
-        cursor.execute(sql)
-        dataset = cursor.fetchall()
-        self.tableWidgetStudent.setRowCount(0)
-        row=0
-        for item in dataset:
-            row = self.tableWidgetStudent.rowCount()
-            self.tableWidgetStudent.insertRow(row)
+        self.syncTimer.stop()
+        # note where the change log ends before reading, so no concurrent edit is missed
+        self.worker.submit(latest_version, on_result=self.loadStudents,
+                           on_error=self.onSyncUnavailable, channel="sync")
+    def onSyncUnavailable(self, error):
+        print("Incremental refresh disabled (run student_change.sql):", error)
+        self.loadStudents(None)
+    def loadStudents(self, version):
+        self.syncVersion = version
+        # the model pulls ID/Code/Name/Age page by page (on the worker) while the view scrolls
+        if self.model is None:
+            self.model = StudentTableModel(self.db, worker=self.worker)
+            # header clicks sort the loaded rows; the proxy keeps them sorted as pages and changes arrive
+            self.proxy = QSortFilterProxyModel(self.MainWindow)
+            self.proxy.setSourceModel(self.model)
+            self.proxy.setSortRole(StudentTableModel.SORT_ROLE)
+            self.tableViewStudent.setModel(self.proxy)
+            self.tableViewStudent.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+            self.tableViewStudent.selectionModel().currentRowChanged.connect(self.processItemSelection)
+        else:
+            self.model.reload()
+        self.model.fetchMore()
+        if version is not None:
+            self.syncTimer.start()
+    def syncChanges(self):
+        if self.worker.isBusy("sync"):
+            return
+        self.worker.submit(read_changes, self.syncVersion, on_result=self.onChangesRead, channel="sync")
+    def onChangesRead(self, result):
+        # only the rows changed since the last sync are read and patched in
+        self.syncVersion, changes = result
+        self.model.applyChanges(changes)
 
+    def processItemSelection(self):
+        row=self.proxy.mapToSource(self.tableViewStudent.currentIndex()).row()
+        if row ==-1:
+            return
+        student_id = self.model.studentAt(row)[0]
+        # clicking quickly through rows supersedes the lookups still pending
+        self.worker.submit(self.loadStudentDetails, student_id,
+                           on_result=self.showStudentDetails, channel="selection")
+    def loadStudentDetails(self, conn, student_id):
+        hashed = self.hasAvatarHashColumn(conn)
+        cursor = conn.cursor()
+        # query one student; with a stored AvatarHash the avatar itself is only fetched on a thumbnail cache miss
+        sql = "select ID,Code,Name,Age,Intro,%s from student where ID=%%s" % ("AvatarHash" if hashed else "NULL")
+        val = (student_id,)
+        cursor.execute(sql, val)
+        item = cursor.fetchone()
+        thumbnail = None
+        if item != None and item[5] == None:
+            # no stored hash (legacy row or unmigrated table): hash the blob here, and keep it when possible
+            cursor.execute("select Avatar from student where ID=%s", val)
+            avatar = cursor.fetchone()
+            if avatar != None and avatar[0] != None:
+                digest = avatar_hash(avatar[0])
+                item = tuple(item[:5]) + (digest,)
+                thumbnail = make_thumbnail(avatar[0])
+                if hashed:
+                    cursor.execute("update student set AvatarHash=%s where ID=%s and AvatarHash is null",
+                                   (digest, student_id))
+                    conn.commit()
+        cursor.close()
+        return item, thumbnail
+    def showStudentDetails(self, result):
+        item, thumbnail = result
+        if item != None:
             self.id = item[0]
             self.code = item[1]
             self.name = item[2]
             self.age = item[3]
-            self.avatar = item[4]
-            self.intro = item[5]
-
-            self.tableWidgetStudent.setItem(row, 0, QTableWidgetItem(str(self.id)))
-            self.tableWidgetStudent.setItem(row, 1, QTableWidgetItem(self.code))
-            self.tableWidgetStudent.setItem(row, 2, QTableWidgetItem(self.name))
-            self.tableWidgetStudent.setItem(row, 3, QTableWidgetItem(str(self.age)))
-
-        cursor.close()
-
-    def processItemSelection(self):
-        row=self.tableWidgetStudent.currentRow()
-        if row ==-1:
+            self.intro = item[4]
+            self.avatarHash = item[5]
+            self.avatar = None
+            self.avatarChanged = False
+            self.lineEditId.setText(str(self.id))
+            self.lineEditCode.setText(self.code)
+            self.lineEditName.setText(self.name)
+            self.lineEditAge.setText(str(self.age))
+            self.lineEditIntro.setText(self.intro)
+            if thumbnail != None:
+                # the blob was already read to hash it
+                self.avatarCache.put(self.id, self.avatarHash, thumbnail)
+            self.showAvatar(self.id, self.avatarHash)
+        else:
+            print("Not Found")
+    def showAvatar(self, student_id, avatar_hash):
+        if avatar_hash == None:
+            self.labelAvatar.setPixmap(QPixmap(self.default_avatar))
             return
-        try:
-            code = self.tableWidgetStudent.item(row, 1).text()
-            cursor = self.conn.cursor()
-            # query all students
-            sql = "select * from student where code=%s"
-            val = (code,)
-            cursor.execute(sql, val)
-            item = cursor.fetchone()
-            if item != None:
-                self.id = item[0]
-                self.code = item[1]
-                self.name = item[2]
-                self.age = item[3]
-                self.avatar = item[4]
-                self.intro = item[5]
-                self.lineEditId.setText(str(self.id))
-                self.lineEditCode.setText(self.code)
-                self.lineEditName.setText(self.name)
-                self.lineEditAge.setText(str(self.age))
-                self.lineEditIntro.setText(self.intro)
-                # self.labelAvatar.setPixmap(None)
-                if self.avatar != None:
-                    imgdata = base64.b64decode(self.avatar)
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(imgdata)
-                    self.labelAvatar.setPixmap(pixmap)
-                else:
-                    pixmap = QPixmap("images/ic_no_avatar.png")
-
-                    self.labelAvatar.setPixmap(pixmap)
-            else:
-                print("Not Found")
-            cursor.close()
-        except:
-            traceback.print_exc()
+        pixmap = self.avatarCache.get(student_id, avatar_hash)
+        if pixmap != None:
+            self.labelAvatar.setPixmap(pixmap)
+            return
+        self.worker.submit(self.loadAvatar, student_id,
+                           on_result=lambda image: self.onAvatarLoaded(student_id, avatar_hash, image),
+                           channel="avatar")
+    def loadAvatar(self, conn, student_id):
+        # runs on the worker: fetch the blob and decode/scale it there
+        cursor = conn.cursor()
+        cursor.execute("select Avatar from student where ID=%s", (student_id,))
+        item = cursor.fetchone()
+        cursor.close()
+        if item == None or item[0] == None:
+            return None
+        return make_thumbnail(item[0])
+    def onAvatarLoaded(self, student_id, avatar_hash, image):
+        if image == None:
+            pixmap = QPixmap(self.default_avatar)
+        else:
+            pixmap = self.avatarCache.put(student_id, avatar_hash, image)
+        if student_id == self.id:
+            self.labelAvatar.setPixmap(pixmap)
 
     def pickAvatar(self):
         filters = "Picture PNG (*.png);;All files(*)"
@@ -116,62 +196,86 @@ class MainWindowEx(Ui_MainWindow):
         pixmap = QPixmap(filename)
         self.labelAvatar.setPixmap(pixmap)
 
+        # stored as a raw BLOB, no base64 round trip
         with open(filename, "rb") as image_file:
-            self.avatar = base64.b64encode(image_file.read())
-            print(self.avatar)
+            self.avatar = image_file.read()
+        self.avatarChanged = True
         pass
     def removeAvatar(self):
         self.avatar=None
+        self.avatarChanged = True
         pixmap = QPixmap(self.default_avatar)
         self.labelAvatar.setPixmap(pixmap)
+    def readForm(self):
+        self.code = self.lineEditCode.text()
+        self.name = self.lineEditName.text()
+        self.age = int(self.lineEditAge.text())
+        self.intro = self.lineEditIntro.text()
     def processInsert(self):
         try:
-            cursor = self.conn.cursor()
-            # query all students
+            self.readForm()
+        except:
+            traceback.print_exc()
+            return
+        val = (self.code, self.name, self.age, self.avatar, self.intro)
+        self.worker.submit(self.insertStudent, val, on_result=self.onStudentInserted)
+    def insertStudent(self, conn, val):
+        hashed = self.hasAvatarHashColumn(conn)
+        cursor = conn.cursor()
+        if hashed:
+            sql = "insert into student(Code,Name,Age,Avatar,AvatarHash,Intro) values(%s,%s,%s,%s,%s,%s)"
+            val = val[:4] + (avatar_hash(val[3]),) + val[4:]
+        else:
             sql = "insert into student(Code,Name,Age,Avatar,Intro) values(%s,%s,%s,%s,%s)"
 
-            self.code = self.lineEditCode.text()
-            self.name = self.lineEditName.text()
-            self.age = int(self.lineEditAge.text())
-            if not hasattr(self, 'avatar'):
-                avatar = None
-            intro = self.lineEditIntro.text()
-            val = (self.code, self.name, self.age, self.avatar, self.intro)
+        cursor.execute(sql, val)
 
-            cursor.execute(sql, val)
+        conn.commit()
 
-            self.conn.commit()
+        print(cursor.rowcount, " record inserted")
+        student_id = cursor.lastrowid
 
-            print(cursor.rowcount, " record inserted")
-            self.lineEditId.setText(str(cursor.lastrowid))
+        cursor.close()
+        return (student_id,) + tuple(val[:3])
+    def onStudentInserted(self, student):
+        self.id = student[0]
+        self.lineEditId.setText(str(self.id))
+        self.model.upsertStudent(student)
 
-            cursor.close()
-            self.selectAllStudent()
+    def processUpdate(self):
+        try:
+            self.id=int(self.lineEditId.text())
+            self.readForm()
         except:
             traceback.print_exc()
-
-    def processUpdate(self):
-        cursor = self.conn.cursor()
-        # query all students
-        sql = "update student set Code=%s,Name=%s,Age=%s,Avatar=%s,Intro=%s" \
-              " where Id=%s"
-        self.id=int(self.lineEditId.text())
-        self.code = self.lineEditCode.text()
-        self.name = self.lineEditName.text()
-        self.age = int(self.lineEditAge.text())
-        if not hasattr(self, 'avatar'):
-            self.avatar = None
-        self.intro = self.lineEditIntro.text()
-
-        val = (self.code,self.name,self.age,self.avatar ,self.intro,self.id )
+            return
+        if self.avatarChanged:
+            val = (self.code,self.name,self.age,self.intro,self.avatar,self.id )
+        else:
+            val = (self.code,self.name,self.age,self.intro,self.id )
+        self.worker.submit(self.updateStudent, val, on_result=self.onStudentUpdated)
+    def updateStudent(self, conn, val):
+        hashed = self.hasAvatarHashColumn(conn)
+        cursor = conn.cursor()
+        sql = "update student set Code=%s,Name=%s,Age=%s,Intro=%s"
+        if len(val) == 6 and hashed:
+            sql += ",Avatar=%s,AvatarHash=%s"
+            val = val[:5] + (avatar_hash(val[4]),) + val[5:]
+        elif len(val) == 6:
+            sql += ",Avatar=%s"
+        sql += " where Id=%s"
 
         cursor.execute(sql, val)
 
-        self.conn.commit()
+        conn.commit()
 
         print(cursor.rowcount, " record updated")
         cursor.close()
-        self.selectAllStudent()
+        return (val[-1],) + tuple(val[:3])
+    def onStudentUpdated(self, student):
+        if self.avatarChanged:
+            self.avatarCache.discard(student[0])
+        self.model.upsertStudent(student)
     def processRemove(self):
         dlg = QMessageBox(self.MainWindow)
         dlg.setWindowTitle("Confirmation Deleting")
@@ -182,26 +286,37 @@ class MainWindowEx(Ui_MainWindow):
         button = dlg.exec()
         if button == QMessageBox.StandardButton.No:
             return
-        cursor = self.conn.cursor()
-        # query all students
+        try:
+            student_id = int(self.lineEditId.text())
+        except:
+            traceback.print_exc()
+            return
+        self.worker.submit(self.removeStudent, student_id, on_result=self.onStudentRemoved)
+        self.clearData()
+    def removeStudent(self, conn, student_id):
+        cursor = conn.cursor()
         sql = "delete from student "\
               " where Id=%s"
 
-        val = (self.lineEditId.text(),)
+        val = (student_id,)
 
         cursor.execute(sql, val)
 
-        self.conn.commit()
+        conn.commit()
 
         print(cursor.rowcount, " record removed")
 
         cursor.close()
-        self.selectAllStudent()
-        self.clearData()
+        return student_id
+    def onStudentRemoved(self, student_id):
+        self.avatarCache.discard(student_id)
+        self.model.removeStudent(student_id)
     def clearData(self):
         self.lineEditId.setText("")
         self.lineEditCode.setText("")
         self.lineEditName.setText("")
         self.lineEditAge.setText("")
         self.lineEditIntro.setText("")
-        self.avatar=None
\ No newline at end of file
+        self.avatar=None
+        self.avatarHash=None
+        self.avatarChanged=False
\ No newline at end of file
@@ -0,0 +1,36 @@
+DEFAULT_BATCH = 500
+
+
+def latest_version(conn):
+    """Current end of the student_change log (0 when it is empty)."""
+    cursor = conn.cursor()
+    cursor.execute("select coalesce(max(Version),0) from student_change")
+    version = cursor.fetchone()[0]
+    cursor.close()
+    return version
+
+
+def read_changes(conn, since, batch=DEFAULT_BATCH):
+    """Return (new version, changes) for every logged change after `since`.
+
+    Changes are collapsed per student, last one wins: each is either
+    ("U", (ID, Code, Name, Age)) for a row that exists now or ("D", ID) for
+    one that is gone. The cost depends on the number of changes only, not on
+    the size of the student table.
+    """
+    changes = {}
+    cursor = conn.cursor()
+    sql = "select c.Version,c.StudentID,s.ID,s.Code,s.Name,s.Age " \
+          "from student_change c left join student s on s.ID=c.StudentID " \
+          "where c.Version>%s order by c.Version limit %s"
+    while True:
+        cursor.execute(sql, (since, batch))
+        rows = cursor.fetchall()
+        for version, student_id, *student in rows:
+            # the joined row is the student's current state, whatever the logged op was
+            changes[student_id] = ("U", tuple(student)) if student[0] is not None else ("D", student_id)
+            since = version
+        if len(rows) < batch:
+            break
+    cursor.close()
+    return since, list(changes.values())
@@ -0,0 +1,149 @@
+import traceback
+from bisect import bisect_left
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from connectors.paging import fetch_keyset_page
+
+
+class StudentTableModel(QAbstractTableModel):
+    """Lazy table model over the student table.
+
+    Only ID, Code, Name and Age are read (never the avatar), one keyset page
+    at a time as the view scrolls (canFetchMore/fetchMore). Rows stay ordered
+    by ID, so inserts, updates and deletes are patched in place instead of
+    reloading the whole table. With a DbWorker the pages are read on a pool
+    thread and appended when they arrive, so scrolling never blocks the GUI.
+    """
+    COLUMNS = ["ID", "Code", "Name", "Age"]
+    # raw values for sorting (numbers as numbers, not display strings)
+    SORT_ROLE = Qt.ItemDataRole.UserRole
+    PAGE_CHANNEL = "student-pages"
+
+    def __init__(self, db, page_size=200, worker=None, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.page_size = page_size
+        self.worker = worker
+        self.ids = []
+        self.students = []
+        self.exhausted = False
+        self.loading = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.students)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.students[index.row()][index.column()]
+        if role == self.SORT_ROLE:
+            return value
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return "" if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return str(section + 1)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted or self.loading:
+            return
+        last_id = self.ids[-1] if self.ids else None
+        if self.worker is None:
+            with self.db.connection() as conn:
+                self.appendPage(self.readPage(conn, last_id))
+            return
+        self.loading = True
+        self.worker.submit(self.readPage, last_id, on_result=self.onPage, on_error=self.onPageError,
+                           channel=self.PAGE_CHANNEL)
+
+    def readPage(self, conn, last_id):
+        return fetch_keyset_page(conn, "student", key="ID", columns=self.COLUMNS,
+                                 page_size=self.page_size, start_after=last_id)
+
+    def onPage(self, page):
+        self.loading = False
+        self.appendPage(page)
+
+    def onPageError(self, error):
+        self.loading = False
+        traceback.print_exception(error)
+
+    def appendPage(self, page):
+        if len(page) < self.page_size:
+            self.exhausted = True
+        if not page:
+            return
+        first = len(self.students)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        for student in page:
+            self.ids.append(student[0])
+            self.students.append(tuple(student))
+        self.endInsertRows()
+
+    def reload(self):
+        """Forget every loaded page; the view fetches the first page again."""
+        if self.worker is not None:
+            # a page still in flight belongs to the old contents
+            self.worker.cancel(self.PAGE_CHANNEL)
+        self.loading = False
+        self.beginResetModel()
+        self.ids = []
+        self.students = []
+        self.exhausted = False
+        self.endResetModel()
+
+    def studentAt(self, row):
+        return self.students[row]
+
+    def rowOfId(self, student_id):
+        row = bisect_left(self.ids, student_id)
+        if row < len(self.ids) and self.ids[row] == student_id:
+            return row
+        return -1
+
+    def upsertStudent(self, student):
+        """Insert or replace one (ID, Code, Name, Age) row at its ID position."""
+        student = tuple(student)
+        student_id = student[0]
+        row = self.rowOfId(student_id)
+        if row != -1:
+            self.students[row] = student
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+            return
+        row = bisect_left(self.ids, student_id)
+        if row == len(self.ids) and not self.exhausted:
+            # beyond the loaded pages: it will arrive with a later fetchMore
+            return
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.ids.insert(row, student_id)
+        self.students.insert(row, student)
+        self.endInsertRows()
+
+    def applyChanges(self, changes):
+        """Patch in ("U", student) / ("D", student_id) changes, see StudentSync.read_changes."""
+        for op, change in changes:
+            if op == "D":
+                self.removeStudent(change)
+            else:
+                self.upsertStudent(change)
+
+    def removeStudent(self, student_id):
+        row = self.rowOfId(student_id)
+        if row == -1:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.ids[row]
+        del self.students[row]
+        self.endRemoveRows()
@@ -0,0 +1,59 @@
+from AvatarCache import avatar_hash, decode_avatar
+from connectors.mysql_pool import PooledConnector
+from connectors.paging import iter_keyset_pages
+
+
+def has_avatar_hash_column(conn):
+    """True once student.AvatarHash exists (added by migrate_avatars)."""
+    cursor = conn.cursor()
+    cursor.execute("select count(*) from information_schema.columns "
+                   "where table_schema=database() and table_name='student' and column_name='AvatarHash'")
+    found = cursor.fetchone()[0] > 0
+    cursor.close()
+    return found
+
+
+def migrate_avatars(conn, page_size=100):
+    """Store every avatar as a raw LONGBLOB instead of base64 text, with its MD5 in AvatarHash.
+
+    The column type is changed first (MODIFY keeps the stored bytes) and the
+    AvatarHash column added if missing, then rows still holding base64 are
+    decoded and rewritten page by page, one commit per page, so the script
+    can be stopped and run again safely. Rows left without a hash get one last.
+    Returns the number of rows converted.
+    """
+    cursor = conn.cursor()
+    cursor.execute("alter table student modify Avatar LONGBLOB null")
+    if not has_avatar_hash_column(conn):
+        cursor.execute("alter table student add column AvatarHash char(32) null after Avatar")
+    cursor.close()
+
+    converted = 0
+    for page in iter_keyset_pages(conn, "student", key="ID", columns=["ID", "Avatar"], page_size=page_size,
+                                  where="Avatar is not null"):
+        val = []
+        for student_id, avatar in page:
+            data = decode_avatar(avatar)
+            if data != bytes(avatar):
+                val.append((data, avatar_hash(data), student_id))
+        if not val:
+            continue
+        cursor = conn.cursor()
+        cursor.executemany("update student set Avatar=%s,AvatarHash=%s where ID=%s", val)
+        conn.commit()
+        cursor.close()
+        converted += len(val)
+        print(converted, " avatars converted")
+
+    cursor = conn.cursor()
+    cursor.execute("update student set AvatarHash=MD5(Avatar) where AvatarHash is null and Avatar is not null")
+    conn.commit()
+    print(cursor.rowcount, " avatar hashes filled in")
+    cursor.close()
+    return converted
+
+
+if __name__ == "__main__":
+    db = PooledConnector(database="studentmanagement", password="@Obama123")
+    with db.connection() as conn:
+        migrate_avatars(conn)
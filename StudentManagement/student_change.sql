@@ -0,0 +1,30 @@
+-- Change log for incremental refresh of the student grid.
+-- Every insert/update/delete on student appends one row; clients remember the
+-- last Version they applied and only read the rows after it.
+
+create table if not exists student_change (
+    Version bigint not null auto_increment primary key,
+    StudentID int not null,
+    Op char(1) not null,  -- 'U' inserted or updated, 'D' deleted
+    ChangedAt timestamp not null default current_timestamp
+);
+
+drop trigger if exists student_after_insert;
+drop trigger if exists student_after_update;
+drop trigger if exists student_after_delete;
+
+create trigger student_after_insert after insert on student for each row
+    insert into student_change(StudentID, Op) values (new.ID, 'U');
+
+-- avatar-only changes do not touch the grid columns, so they are not logged
+create trigger student_after_update after update on student for each row
+    insert into student_change(StudentID, Op)
+    select new.ID, 'U' from dual
+    where not (old.ID <=> new.ID and old.Code <=> new.Code and old.Name <=> new.Name
+               and old.Age <=> new.Age and old.Intro <=> new.Intro);
+
+create trigger student_after_delete after delete on student for each row
+    insert into student_change(StudentID, Op) values (old.ID, 'D');
+
+-- old entries can be pruned once every client has synced past them, e.g.
+-- delete from student_change where ChangedAt < now() - interval 7 day;
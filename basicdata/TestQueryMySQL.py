@@ -1,4 +1,6 @@
-import mysql.connector
+from connectors.mysql_pool import PooledConnector
+from connectors.bulk_load import bulk_upsert
+from connectors.paging import iter_keyset_pages
 
 server="localhost"
 port=3306
@@ -6,12 +8,13 @@ database="studentmanagement"
 username="root"
 password="@Obama123"
 
-conn = mysql.connector.connect(
-                host=server,
+db = PooledConnector(
+                server=server,
                 port=port,
                 database=database,
-                user=username,
+                username=username,
                 password=password)
+conn = db.get_connection()
 cursor = conn.cursor()
 
 sql="select * from student"
@@ -144,19 +147,9 @@ cursor.close()
 
 #2.6.3
 print("PAGING!!!!!")
-cursor = conn.cursor()
-sql="SELECT count(*) FROM student"
-cursor.execute(sql)
-dataset=cursor.fetchone()
-rowcount=dataset[0]
-
+# keyset paging: each page seeks past the last ID, no count(*) or OFFSET scan
 limit=3
-step=3
-for offset in range(0,rowcount,step):
-    sql=f"SELECT * FROM student LIMIT {limit} OFFSET {offset}"
-    cursor.execute(sql)
-
-    dataset=cursor.fetchall()
+for dataset in iter_keyset_pages(conn, "student", key="ID", columns=["ID","Code","Name","Age"], page_size=limit):
     align='{0:<3} {1:<6} {2:<15} {3:<10}'
     print(align.format('ID', 'Code','Name',"Age"))
     for item in dataset:
@@ -164,12 +157,8 @@ for offset in range(0,rowcount,step):
         code=item[1]
         name=item[2]
         age=item[3]
-        avatar=item[4]
-        intro=item[5]
         print(align.format(id,code,name,age))
 
-cursor.close()
-
 #3.1
 cursor = conn.cursor()
 
@@ -186,23 +175,17 @@ print(cursor.rowcount," record inserted")
 cursor.close()
 
 #3.2
-cursor = conn.cursor()
-
-sql="insert into student (code,name,age) values (%s,%s,%s)"
-
 val=[
     ("sv08","Trần Quyết Chiến",19),
     ("sv09","Hồ Thắng",22),
     ("sv10","Hoàng Hà",25),
      ]
 
-cursor.executemany(sql,val)
+# multi-row INSERT ... ON DUPLICATE KEY UPDATE in one transaction;
+# also accepts a DataFrame or a CSV path for large imports
+stats=bulk_upsert(conn,"student",val,columns=["code","name","age"],batch_size=1000)
 
-conn.commit()
-
-print(cursor.rowcount," record inserted")
-
-cursor.close()
+print(stats["rows"]," record inserted")
 
 #4.1
 cursor = conn.cursor()
@@ -225,12 +208,6 @@ conn.commit()
 print(cursor.rowcount," record(s) affected")
 
 #5.1
-conn = mysql.connector.connect(
-                host=server,
-                port=port,
-                database=database,
-                user=username,
-                password=password)
 cursor = conn.cursor()
 sql="DELETE from student where ID=14"
 cursor.execute(sql)
@@ -240,12 +217,6 @@ conn.commit()
 print(cursor.rowcount," record(s) affected")
 
 #5.2
-conn = mysql.connector.connect(
-                host=server,
-                port=port,
-                database=database,
-                user=username,
-                password=password)
 cursor = conn.cursor()
 sql = "DELETE from student where ID=%s"
 val = (13,)
@@ -254,4 +225,7 @@ cursor.execute(sql, val)
 
 conn.commit()
 
-print(cursor.rowcount," record(s) affected")
\ No newline at end of file
+print(cursor.rowcount," record(s) affected")
+
+cursor.close()
+conn.close()
\ No newline at end of file
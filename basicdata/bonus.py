@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 def list_invoices_by_total(df, minValue, maxValue, SortType=True):
@@ -21,11 +22,169 @@ def list_invoices_by_total(df, minValue, maxValue, SortType=True):
     return list(filtered.itertuples(index=False, name=None))
 
 
-# --- Ví dụ dùng / Example usage ---
-df = pd.read_csv('../dataset/SalesTransactions/SalesTransactions.csv')
+class OrderTotalsAccumulator:
+    """
+    Cộng dồn tổng tiền theo OrderID bằng hai mảng NumPy đã sắp xếp (ids, sums).
+    Accumulates per-order totals in two sorted NumPy arrays (ids, sums), so memory
+    grows with the number of distinct orders, not with the number of rows.
+    OrderIDs not seen before wait in a buffer and are merged in once the buffer is
+    as large as the arrays, so each merge's copy is paid for by the rows it adds.
+    """
+    MIN_MERGE = 1 << 16
+
+    def __init__(self):
+        self._ids = np.empty(0, dtype=np.int64)
+        self._sums = np.empty(0, dtype=np.float64)
+        self._pending_ids = []
+        self._pending_sums = []
+        self._pending = 0
+
+    def add(self, order_ids, amounts):
+        # Gộp trong chunk trước / reduce inside the chunk first
+        uniq, inverse = np.unique(np.asarray(order_ids, dtype=np.int64), return_inverse=True)
+        chunk_sums = np.bincount(inverse, weights=np.asarray(amounts, dtype=np.float64),
+                                 minlength=len(uniq))
+
+        # Cộng vào các OrderID đã có / add into orders we have already seen
+        pos = np.searchsorted(self._ids, uniq)
+        known = pos < len(self._ids)
+        known[known] = self._ids[pos[known]] == uniq[known]
+        np.add.at(self._sums, pos[known], chunk_sums[known])
+
+        # OrderID mới vào bộ đệm / new orders go to the buffer
+        if not known.all():
+            self._pending_ids.append(uniq[~known])
+            self._pending_sums.append(chunk_sums[~known])
+            self._pending += int((~known).sum())
+            if self._pending >= max(len(self._ids), self.MIN_MERGE):
+                self._merge()
+
+    def _merge(self):
+        # Gộp bộ đệm vào mảng đã sắp xếp / merge the buffer into the sorted arrays
+        if not self._pending:
+            return
+        uniq, inverse = np.unique(np.concatenate(self._pending_ids), return_inverse=True)
+        sums = np.bincount(inverse, weights=np.concatenate(self._pending_sums), minlength=len(uniq))
+        # buffered ids are never in _ids (they were looked up there first), so a plain merge is enough
+        ids = np.concatenate([self._ids, uniq])
+        order = np.argsort(ids, kind='stable')
+        self._ids = ids[order]
+        self._sums = np.concatenate([self._sums, sums])[order]
+        self._pending_ids, self._pending_sums, self._pending = [], [], 0
+
+    @property
+    def ids(self):
+        self._merge()
+        return self._ids
+
+    @property
+    def sums(self):
+        self._merge()
+        return self._sums
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def list_invoices_by_total_chunked(path, minValue, maxValue, SortType=True, chunksize=100_000):
+    """
+    Giống list_invoices_by_total nhưng đọc file CSV theo từng chunk cố định.
+    Same result as list_invoices_by_total, but streams the CSV at `path` in chunks of
+    `chunksize` rows; peak memory is bounded by the number of distinct OrderIDs.
+    """
+    acc = OrderTotalsAccumulator()
+    reader = pd.read_csv(
+        path,
+        usecols=['OrderID', 'UnitPrice', 'Quantity', 'Discount'],
+        dtype={'OrderID': 'int64', 'UnitPrice': 'float64', 'Quantity': 'float64', 'Discount': 'float64'},
+        chunksize=chunksize,
+    )
+    for chunk in reader:
+        amounts = chunk['UnitPrice'].to_numpy() * chunk['Quantity'].to_numpy() * (1 - chunk['Discount'].to_numpy())
+        acc.add(chunk['OrderID'].to_numpy(), amounts)
+
+    # Lọc theo khoảng và sắp xếp / filter by range and sort
+    mask = (acc.sums >= minValue) & (acc.sums <= maxValue)
+    ids, sums = acc.ids[mask], acc.sums[mask]
+    order = np.argsort(sums if SortType else -sums, kind='stable')
+    return list(zip(ids[order].tolist(), sums[order].tolist()))
+
+
+class InvoiceTotalsIndex:
+    """
+    Chỉ mục tổng tiền theo hóa đơn, xây một lần rồi truy vấn nhiều lần.
+    Per-order totals stored sorted by Sum, built once from a SalesTransactions frame;
+    range queries use searchsorted, so each call costs O(log n + k).
+    """
+    def __init__(self, order_ids, sums):
+        order = np.argsort(sums, kind='stable')
+        self.ids = np.asarray(order_ids)[order]
+        self.sums = np.asarray(sums, dtype=np.float64)[order]
+
+    @classmethod
+    def from_frame(cls, df):
+        amounts = df['UnitPrice'].to_numpy(dtype=np.float64) * df['Quantity'].to_numpy(dtype=np.float64) \
+                  * (1 - df['Discount'].to_numpy(dtype=np.float64))
+        acc = OrderTotalsAccumulator()
+        acc.add(df['OrderID'].to_numpy(), amounts)
+        return cls(acc.ids, acc.sums)
+
+    @classmethod
+    def from_accumulator(cls, acc):
+        return cls(acc.ids, acc.sums)
+
+    def __len__(self):
+        return len(self.sums)
+
+    def _bounds(self, minValue, maxValue):
+        lo = np.searchsorted(self.sums, minValue, side='left')
+        hi = np.searchsorted(self.sums, maxValue, side='right')
+        return lo, max(lo, hi)
+
+    def _pairs(self, lo, hi, SortType):
+        ids, sums = self.ids[lo:hi], self.sums[lo:hi]
+        if not SortType:
+            ids, sums = ids[::-1], sums[::-1]
+        return list(zip(ids.tolist(), sums.tolist()))
+
+    def range(self, minValue, maxValue, SortType=True):
+        """
+        Danh sách (OrderID, Sum) có tổng trong [minValue, maxValue].
+        Same output as list_invoices_by_total(df, minValue, maxValue, SortType).
+        """
+        lo, hi = self._bounds(minValue, maxValue)
+        return self._pairs(lo, hi, SortType)
+
+    def count(self, minValue, maxValue):
+        """Số hóa đơn có tổng trong [minValue, maxValue] / number of orders in range."""
+        lo, hi = self._bounds(minValue, maxValue)
+        return int(hi - lo)
+
+    def top(self, n, largest=True):
+        """N hóa đơn lớn nhất (hoặc nhỏ nhất) / the n largest (or smallest) orders."""
+        n = max(0, min(n, len(self)))
+        if largest:
+            return self._pairs(len(self) - n, len(self), False)
+        return self._pairs(0, n, True)
+
+
+if __name__ == "__main__":
+    # --- Ví dụ dùng / Example usage ---
+    df = pd.read_csv('../dataset/SalesTransactions/SalesTransactions.csv')
+
+    # ascending like "SortType=True" table
+    print(pd.DataFrame(list_invoices_by_total(df, 400, 1000, True), columns=['OrderID','Sum']))
+
+    # descending like "SortType=False" table
+    print(pd.DataFrame(list_invoices_by_total(df, 400, 1000, False), columns=['OrderID','Sum']))
 
-# ascending like "SortType=True" table
-print(pd.DataFrame(list_invoices_by_total(df, 400, 1000, True), columns=['OrderID','Sum']))
+    # streaming mode for files larger than RAM
+    print(pd.DataFrame(list_invoices_by_total_chunked('../dataset/SalesTransactions/SalesTransactions.csv',
+                                                      400, 1000, False, chunksize=500),
+                       columns=['OrderID','Sum']))
 
-# descending like "SortType=False" table
-print(pd.DataFrame(list_invoices_by_total(df, 400, 1000, False), columns=['OrderID','Sum']))
+    # build once, query many times
+    index = InvoiceTotalsIndex.from_frame(df)
+    print(pd.DataFrame(index.range(400, 1000, True), columns=['OrderID','Sum']))
+    print("count in [400, 1000]:", index.count(400, 1000))
+    print(pd.DataFrame(index.top(5), columns=['OrderID','Sum']))
@@ -1,6 +1,5 @@
-import pandas as pd
+from basicdata.sales_loader import load_sales
 
-df=pd.read_csv("../dataset/SalesTransactions/SalesTransactions.csv",
-               sep=',',encoding='utf-8',low_memory=False)
+df=load_sales("../dataset/SalesTransactions/SalesTransactions.csv")
 
 print(df)
\ No newline at end of file
@@ -1,5 +1,5 @@
-import pandas as pd
+from basicdata.sales_loader import load_sales
 
-dataframe=pd.read_excel("../dataset/SalesTransactions/SalesTransactions.xlsx")
+dataframe=load_sales("../dataset/SalesTransactions/SalesTransactions.xlsx")
 
 print(dataframe)
\ No newline at end of file
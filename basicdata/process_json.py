@@ -1,8 +1,8 @@
 
 
-import pandas as pd
+from basicdata.sales_loader import load_sales
 
-df=pd.read_json("../dataset/SalesTransactions/SalesTransactions.json",
-                encoding='utf-8',dtype='unicode')
+df=load_sales("../dataset/SalesTransactions/SalesTransactions.json")
 
-print(df)
\ No newline at end of file
+print(df)
+print(df.dtypes)
\ No newline at end of file
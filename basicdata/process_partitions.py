@@ -0,0 +1,11 @@
+from basicdata.sales_loader import discover_partitions, ingest_partitions
+
+if __name__ == "__main__":
+    # the sample folder holds one data set exported in several formats: load one format only
+    folder="../dataset/SalesTransactions"
+    pattern="**/*.csv"
+    print(discover_partitions(folder, pattern))
+
+    df=ingest_partitions(folder, pattern)
+    print(df)
+    print(df.dtypes)
\ No newline at end of file
@@ -1,4 +1,5 @@
-import pandas as pd
-
-df=pd.read_csv("../dataset/SalesTransactions/SalesTransactions.txt", encoding='utf-8',dtype='unicode',sep='\t',low_memory=False)
-print(df)
\ No newline at end of file
+from basicdata.sales_loader import load_sales
+
+df=load_sales("../dataset/SalesTransactions/SalesTransactions.txt")
+print(df)
+print(df.dtypes)
\ No newline at end of file
@@ -1,19 +1,13 @@
-#from bs4 import BeautifulSoup
-import pandas_read_xml as pdx
+from basicdata.sales_loader import load_sales
+from basicdata.sales_xml import iter_sales_xml_batches
 
-#with open('../dataset/SalesTransactions/SalesTransactions.xml','r') as f:
-    #data=f.read()
-
-#bs_data=BeautifulSoup(data,'xml')
-
-#UelSample=bs_data.find_all('UelSample')
-#print(UelSample)
-
-df=pdx.read_xml('../dataset/SalesTransactions/SalesTransactions.xml',['UelSample','SalesItem'])
+df=load_sales('../dataset/SalesTransactions/SalesTransactions.xml')
 print(df)
-print(df.iloc[0])
+print(df.dtypes)
 data=df.iloc[0]
 
-print(data[0])
-print(data[1])
-print(data[1]["OrderID"])
\ No newline at end of file
+print(data["OrderID"])
+
+# stream the file in batches without building the whole document
+for batch in iter_sales_xml_batches('../dataset/SalesTransactions/SalesTransactions.xml',batch_size=1000):
+    print(len(batch),"rows, first OrderID:",batch["OrderID"].iloc[0])
\ No newline at end of file
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from basicdata.sales_xml import read_sales_xml
+
+# Bump when the cached layout changes so old cache files are rebuilt.
+CACHE_VERSION = 4
+CACHE_DIR_NAME = ".cache"
+
+# Declared SalesTransactions schema applied by every loader.
+SALES_SCHEMA = {
+    "OrderID": "category",
+    "ProductID": "category",
+    "UnitPrice": "float32",
+    "Quantity": "int32",
+    "Discount": "float32",
+}
+INTEGER_COLUMNS = ("OrderID", "ProductID", "Quantity")
+SUPPORTED_SUFFIXES = (".csv", ".txt", ".json", ".xml", ".xlsx", ".xls")
+
+
+def read_sales_source(path) -> pd.DataFrame:
+    """Parse one SalesTransactions file (csv/txt/json/xml/xlsx) into a DataFrame."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return pd.read_csv(path, sep=",", encoding="utf-8", low_memory=False)
+    if suffix == ".txt":
+        return pd.read_csv(path, sep="\t", encoding="utf-8", low_memory=False)
+    if suffix == ".json":
+        return pd.read_json(path, encoding="utf-8")
+    if suffix == ".xml":
+        return read_sales_xml(path)
+    if suffix in (".xlsx", ".xls"):
+        return pd.read_excel(path)
+    raise ValueError(f"Unsupported SalesTransactions format: {path.name}")
+
+
+def validate_sales(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Split `df` into (typed rows, bad rows) according to SALES_SCHEMA.
+
+    A row is bad when a column is missing, not numeric, or not a whole number
+    for the integer columns. Bad rows are returned with their original values.
+    """
+    missing = [c for c in SALES_SCHEMA if c not in df.columns]
+    if missing:
+        raise ValueError(f"SalesTransactions data missing columns: {missing}")
+
+    numeric = {}
+    bad = pd.Series(False, index=df.index)
+    for col in SALES_SCHEMA:
+        values = pd.to_numeric(df[col], errors="coerce")
+        bad |= values.isna()
+        if col in INTEGER_COLUMNS:
+            bad |= values.notna() & (values % 1 != 0)
+        numeric[col] = values
+
+    good = pd.DataFrame({col: numeric[col][~bad] for col in SALES_SCHEMA})
+    for col, dtype in SALES_SCHEMA.items():
+        if dtype == "category":
+            good[col] = good[col].astype("int64").astype("category")
+        else:
+            good[col] = good[col].astype(dtype)
+    return good.reset_index(drop=True), df[bad]
+
+
+def apply_schema(df: pd.DataFrame, errors: str = "report", source: str = "") -> pd.DataFrame:
+    """Return `df` cast to SALES_SCHEMA.
+
+    errors="report" prints the rejected rows and drops them,
+    errors="raise" raises ValueError if any row is rejected.
+    """
+    good, bad = validate_sales(df)
+    report_rejects(len(bad), bad.head(20).to_string(), errors, source)
+    return good
+
+
+def report_rejects(count: int, preview: str, errors: str = "report", source: str = ""):
+    """Raise (errors="raise") or print a warning about `count` rejected rows; `preview` shows some of them."""
+    if not count:
+        return
+    label = f" in {source}" if source else ""
+    if errors == "raise":
+        raise ValueError(f"{count} invalid SalesTransactions rows{label}:\n{preview}")
+    print(f"[WARN] Skipped {count} invalid SalesTransactions rows{label}:")
+    print(preview)
+
+
+def file_digest(path, chunk_size: int = 1 << 20) -> str:
+    """Return the sha256 of a file, read in fixed-size chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_paths(path, cache_dir=None) -> tuple[Path, Path]:
+    """Return (data_file, meta_file) used to cache `path`."""
+    path = Path(path)
+    cache_dir = Path(cache_dir) if cache_dir is not None else path.parent / CACHE_DIR_NAME
+    stem = f"{path.name}.parquet"
+    return cache_dir / stem, cache_dir / f"{stem}.meta.json"
+
+
+def _read_meta(meta_file: Path) -> dict | None:
+    try:
+        return json.loads(meta_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _cache_is_valid(path: Path, data_file: Path, meta_file: Path) -> bool:
+    meta = _read_meta(meta_file)
+    if meta is None or meta.get("version") != CACHE_VERSION or not data_file.exists():
+        return False
+    stat = path.stat()
+    if meta.get("mtime_ns") == stat.st_mtime_ns and meta.get("size") == stat.st_size:
+        return True
+    # mtime/size changed: only rebuild if the content really changed
+    if meta.get("size") != stat.st_size or meta.get("sha256") != file_digest(path):
+        return False
+    meta["mtime_ns"] = stat.st_mtime_ns
+    meta_file.write_text(json.dumps(meta), encoding="utf-8")
+    return True
+
+
+def load_sales(path, cache_dir=None, refresh: bool = False, errors: str = "report") -> pd.DataFrame:
+    """Load a SalesTransactions file, typed by SALES_SCHEMA, through a Parquet cache.
+
+    The first call parses the source and writes `<cache_dir>/<name>.parquet`
+    next to a small meta file holding the source mtime, size and sha256.
+    Later calls read the Parquet file directly while the mtime and size are
+    unchanged; if only the mtime moved, the hash decides whether to rebuild.
+    The meta file also records the rows rejected by the schema, so a cache hit
+    reports them again (or raises, with errors="raise") like a fresh parse.
+    """
+    path = Path(path)
+    data_file, meta_file = cache_paths(path, cache_dir)
+    if not refresh and _cache_is_valid(path, data_file, meta_file):
+        meta = _read_meta(meta_file)
+        report_rejects(meta.get("rejected", 0), meta.get("rejected_preview", ""), errors, path.name)
+        # Parquet stores the categorical IDs as plain integers
+        return pd.read_parquet(data_file).astype(SALES_SCHEMA)
+
+    good, bad = validate_sales(read_sales_source(path))
+    preview = bad.head(20).to_string()
+    report_rejects(len(bad), preview, errors, path.name)
+    df = good
+    data_file.parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(data_file, index=False)
+    stat = path.stat()
+    meta = {
+        "version": CACHE_VERSION,
+        "source": path.name,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": file_digest(path),
+        "rejected": len(bad),
+        "rejected_preview": preview if len(bad) else "",
+    }
+    meta_file.write_text(json.dumps(meta), encoding="utf-8")
+    return df
+
+
+def discover_partitions(directory, pattern: str = "**/*") -> list[Path]:
+    """Return every SalesTransactions file under `directory`, sorted by path.
+
+    Partitions must not overlap: each file holds its own rows. Files that only
+    differ by extension (the same data exported in several formats) are
+    warned about; narrow `pattern` (e.g. "**/*.csv") to pick one format.
+    """
+    directory = Path(directory)
+    files = sorted(
+        p for p in directory.glob(pattern)
+        if p.is_file() and p.suffix.lower() in SUPPORTED_SUFFIXES and CACHE_DIR_NAME not in p.parts
+    )
+    stems = {}
+    for p in files:
+        stems.setdefault(p.with_suffix(""), []).append(p.suffix)
+    for stem, suffixes in stems.items():
+        if len(suffixes) > 1:
+            print(f"[WARN] {stem.name} exists as {', '.join(suffixes)}: "
+                  f"every copy is loaded as a separate partition")
+    return files
+
+
+def _load_partition(path: Path, use_cache: bool, errors: str) -> pd.DataFrame:
+    if use_cache:
+        return load_sales(path, errors=errors)
+    return apply_schema(read_sales_source(path), errors=errors, source=path.name)
+
+
+def ingest_partitions(directory, pattern: str = "**/*", max_workers: int | None = None,
+                      use_cache: bool = True, errors: str = "report", out_path=None) -> pd.DataFrame:
+    """Load every partition under `directory` in a process pool and concatenate them.
+
+    Each file is parsed by its own worker (through the Parquet cache unless
+    `use_cache` is False). The partitions must not overlap; rows are
+    concatenated as they are, without deduplication. The result is typed by SALES_SCHEMA and, if
+    `out_path` is given, also written there as one Parquet file.
+    """
+    files = discover_partitions(directory, pattern)
+    if not files:
+        raise FileNotFoundError(f"No SalesTransactions partitions found in {directory}")
+
+    workers = max_workers or min(len(files), os.cpu_count() or 1)
+    if workers <= 1:
+        frames = [_load_partition(p, use_cache, errors) for p in files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(_load_partition, files, [use_cache] * len(files), [errors] * len(files)))
+
+    # categories differ between partitions, so re-apply the schema after concat
+    df = pd.concat(frames, ignore_index=True).astype(SALES_SCHEMA)
+    if out_path is not None:
+        out_path = Path(out_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(out_path, index=False)
+    return df
@@ -0,0 +1,88 @@
+from xml.parsers import expat
+
+import numpy as np
+import pandas as pd
+
+ROOT_TAG = "UelSample"
+ITEM_TAG = "SalesItem"
+INT_FIELDS = ("OrderID", "ProductID", "Quantity")
+FIELDS = ("OrderID", "ProductID", "UnitPrice", "Quantity", "Discount")
+
+
+def _to_number(values: list) -> np.ndarray:
+    try:
+        # fast path: every value is a well-formed number (surrounding whitespace is fine)
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        # unparsable or missing values become NaN so schema validation can report the row
+        values = pd.Series(values, dtype=object).str.strip()
+        return pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _to_batch(columns: dict[str, list]) -> pd.DataFrame:
+    data = {}
+    for name in FIELDS:
+        values = _to_number(columns[name])
+        if name in INT_FIELDS and not np.isnan(values).any() and (values % 1 == 0).all():
+            data[name] = values.astype(np.int64)
+        else:
+            data[name] = values
+    return pd.DataFrame(data, columns=list(FIELDS))
+
+
+def iter_sales_xml_batches(path, batch_size: int = 50_000, read_size: int = 1 << 20):
+    """Stream `<UelSample><SalesItem>` records as typed DataFrame batches.
+
+    The file is fed to expat (the parser under ElementTree.iterparse) in
+    `read_size` byte blocks. No Element objects are built: the root tag is
+    taken from the first start event (the start handler then removes itself)
+    and only end and text events are handled, copying each field's text
+    into column lists. Memory stays bounded by `batch_size` rather than file size.
+    """
+    columns = {name: [] for name in FIELDS}
+    item = dict.fromkeys(FIELDS)
+    text = []
+    root = []
+
+    def start(tag, attrs):
+        root.append(tag)
+        parser.StartElementHandler = None
+
+    def end(tag):
+        nonlocal item
+        if tag in item:
+            # text since the previous end event: the value, plus any whitespace before the tag
+            item[tag] = "".join(text)
+        elif tag == ITEM_TAG:
+            for name in FIELDS:
+                columns[name].append(item[name])
+            item = dict.fromkeys(FIELDS)
+        text.clear()
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = text.append
+    with open(path, "rb") as fh:
+        while True:
+            block = fh.read(read_size)
+            parser.Parse(block, not block)
+            if root and root[0] != ROOT_TAG:
+                raise ValueError(f"Expected <{ROOT_TAG}> as the XML root, found <{root[0]}>")
+            while len(columns[FIELDS[0]]) >= batch_size:
+                batch = {name: values[:batch_size] for name, values in columns.items()}
+                columns = {name: values[batch_size:] for name, values in columns.items()}
+                yield _to_batch(batch)
+            if not block:
+                break
+    if columns[FIELDS[0]]:
+        yield _to_batch(columns)
+
+
+def read_sales_xml(path, batch_size: int = 50_000) -> pd.DataFrame:
+    """Read a whole SalesTransactions XML file with the streaming parser."""
+    batches = list(iter_sales_xml_batches(path, batch_size))
+    if not batches:
+        return _to_batch({name: [] for name in FIELDS})
+    return pd.concat(batches, ignore_index=True)
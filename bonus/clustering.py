@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.cluster import KMeans
+
+# Bump when the fingerprint or the stored model layout changes so old models are refitted.
+MODEL_CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".cache" / "kmeans"
+DEFAULT_PARAMS = {"init": "k-means++", "max_iter": 500, "random_state": 42}
+
+
+class ClusteringResult:
+    """One KMeans fit: labels, centroids and inertia plus the model and its data fingerprint."""
+    def __init__(self, model: KMeans, fingerprint: str, from_cache: bool):
+        self.model = model
+        self.labels = model.labels_
+        self.centroids = model.cluster_centers_
+        self.inertia = model.inertia_
+        self.fingerprint = fingerprint
+        self.from_cache = from_cache
+
+
+def data_fingerprint(X, params: dict) -> str:
+    """sha256 over the cache version, the KMeans parameters and the exact values of X."""
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    digest = hashlib.sha256()
+    digest.update(json.dumps({"version": MODEL_CACHE_VERSION, "shape": X.shape, "params": params},
+                             sort_keys=True, default=str).encode("utf-8"))
+    digest.update(X.tobytes())
+    return digest.hexdigest()
+
+
+def fit_kmeans(X, n_clusters: int, cache_dir=DEFAULT_CACHE_DIR, refresh: bool = False, **params) -> ClusteringResult:
+    """Fit KMeans once and return labels, centroids and inertia together.
+
+    The fitted model is stored under `cache_dir` by the fingerprint of X and
+    the parameters, so running again on unchanged data loads it instead of
+    training. Pass cache_dir=None to disable the cache, refresh=True to refit.
+    """
+    params = {**DEFAULT_PARAMS, **params, "n_clusters": n_clusters}
+    X = np.asarray(X, dtype=np.float64)
+    fingerprint = data_fingerprint(X, params)
+    path = Path(cache_dir) / f"kmeans_{fingerprint}.joblib" if cache_dir is not None else None
+
+    if path is not None and not refresh and path.exists():
+        try:
+            return ClusteringResult(joblib.load(path), fingerprint, from_cache=True)
+        except Exception as e:
+            print("[WARN] Ignoring unreadable cached model:", path.name, e)
+
+    model = KMeans(**params).fit(X)
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        joblib.dump(model, tmp)
+        os.replace(tmp, path)
+    return ClusteringResult(model, fingerprint, from_cache=False)
@@ -0,0 +1,60 @@
+import pandas as pd
+import xlsxwriter
+
+WIDTH_SAMPLE_ROWS = 10_000
+WRITE_CHUNK_ROWS = 50_000
+HEADER_FORMAT = {"bold": True, "bg_color": "#F1F5F9", "border": 1}
+CELL_FORMAT = {"border": 1}
+
+
+def column_widths(df: pd.DataFrame, sample_rows: int = WIDTH_SAMPLE_ROWS, quantile: float = 0.9,
+                  min_width: int = 10, max_width: int = 35) -> dict:
+    """Estimate a display width per column from a random sample of at most `sample_rows` rows.
+
+    Computed once and reused for every sheet that shows these columns.
+    """
+    sample = df.sample(n=sample_rows, random_state=0) if len(df) > sample_rows else df
+    widths = {}
+    for col in df.columns:
+        lengths = sample[col].astype(str).str.len()
+        estimate = int(lengths.quantile(quantile)) if len(lengths) else 0
+        widths[col] = max(min_width, min(max_width, max(estimate, len(str(col))) + 2))
+    return widths
+
+
+def write_excel(out_path, sheets, widths: dict | None = None,
+                header_format: dict = HEADER_FORMAT, cell_format: dict = CELL_FORMAT) -> str:
+    """Write (sheet name, DataFrame) pairs to one workbook with xlsxwriter's constant_memory mode.
+
+    Rows are streamed to disk as they are written, so memory use stays flat
+    however many rows there are; `sheets` may be a generator so only one
+    sheet's frame needs to exist at a time. `widths` maps column -> width
+    (see column_widths); missing columns get a width from their own sample.
+    """
+    out_path = str(out_path)
+    workbook = xlsxwriter.Workbook(out_path, {"constant_memory": True,
+                                              "default_date_format": "yyyy-mm-dd hh:mm:ss"})
+    header_fmt = workbook.add_format(header_format)
+    cell_fmt = workbook.add_format(cell_format)
+    try:
+        for name, frame in sheets:
+            ws = workbook.add_worksheet(name)
+            sheet_widths = widths or {}
+            if any(col not in sheet_widths for col in frame.columns):
+                sheet_widths = {**column_widths(frame), **sheet_widths}
+            for col_idx, col in enumerate(frame.columns):
+                ws.set_column(col_idx, col_idx, sheet_widths[col], cell_fmt)
+            ws.set_row(0, 20)
+            ws.write_row(0, 0, [str(c) for c in frame.columns], header_fmt)
+            row_idx = 1
+            for start in range(0, len(frame), WRITE_CHUNK_ROWS):
+                chunk = frame.iloc[start:start + WRITE_CHUNK_ROWS]
+                # NaN/NaT -> empty cell; numpy scalars -> Python values xlsxwriter understands
+                chunk = chunk.astype(object).where(chunk.notna(), None)
+                for values in chunk.itertuples(index=False, name=None):
+                    # no cell format: the column's border format applies, dates get default_date_format
+                    ws.write_row(row_idx, 0, values)
+                    row_idx += 1
+    finally:
+        workbook.close()
+    return out_path
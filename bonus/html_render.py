@@ -0,0 +1,45 @@
+import html
+from typing import TextIO
+
+import pandas as pd
+
+# (character, entity) pairs; "&" must be replaced first
+_ENTITIES = [("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#x27;")]
+
+TABLE_CLASS = "table table-dark table-striped table-hover"
+
+
+def escape_column(values: pd.Series) -> pd.Series:
+    """HTML-escape a whole column as text; missing values become empty strings."""
+    text = values.astype(object).where(values.notna(), "").astype(str)
+    for char, entity in _ENTITIES:
+        if text.str.contains(char, regex=False).any():
+            text = text.str.replace(char, entity, regex=False)
+    return text
+
+
+def render_rows(df: pd.DataFrame, columns=None) -> pd.Series:
+    """Return one escaped "<tr>...</tr>" string per row of `df`.
+
+    Rows are built a column at a time (string concatenation over whole
+    Series) instead of looping over rows with iterrows().
+    """
+    columns = list(columns) if columns is not None else list(df.columns)
+    rows = pd.Series("<tr>", index=df.index, dtype=object)
+    for column in columns:
+        rows = rows + "<td>" + escape_column(df[column]) + "</td>"
+    return rows + "</tr>"
+
+
+def write_table(fh: TextIO, rows, columns, table_class: str = TABLE_CLASS):
+    """Write a <table> with `columns` as header and the pre-rendered `rows` as body."""
+    head = "".join(f"<th>{html.escape(str(c))}</th>" for c in columns)
+    fh.write(f"<table class=\"{table_class}\"><thead><tr>{head}</tr></thead><tbody>")
+    fh.writelines(rows)
+    fh.write("</tbody></table>")
+
+
+def group_rows(df: pd.DataFrame, by: str, columns) -> dict:
+    """Render every row of `df` once and return {group key: rendered rows in original order}."""
+    rendered = render_rows(df, columns).to_numpy()
+    return {key: rendered[positions] for key, positions in df.groupby(by, sort=False).indices.items()}
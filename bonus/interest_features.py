@@ -0,0 +1,132 @@
+import time
+
+SUMMARY_TABLE = "customer_interest_features"
+DEFAULT_BATCH_RENTALS = 50_000
+
+# Per-customer features kept up to date from rental rows past a watermark:
+#   customer_film_seen / customer_category_seen - one row per distinct (customer, film|category),
+#     so the distinct counts are a primary-key prefix count instead of COUNT(DISTINCT) over all rentals
+#   summary_watermark - the last rental_id already folded into the summary
+INTEREST_TABLES_DDL = [
+    f"""CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} (
+        customer_id SMALLINT UNSIGNED NOT NULL PRIMARY KEY,
+        Rentals INT NOT NULL DEFAULT 0,
+        DistinctFilms INT NOT NULL DEFAULT 0,
+        DistinctCategories INT NOT NULL DEFAULT 0,
+        UpdatedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        KEY idx_updated_at (UpdatedAt))""",
+    """CREATE TABLE IF NOT EXISTS customer_film_seen (
+        customer_id SMALLINT UNSIGNED NOT NULL,
+        film_id SMALLINT UNSIGNED NOT NULL,
+        PRIMARY KEY (customer_id, film_id))""",
+    """CREATE TABLE IF NOT EXISTS customer_category_seen (
+        customer_id SMALLINT UNSIGNED NOT NULL,
+        category_id TINYINT UNSIGNED NOT NULL,
+        PRIMARY KEY (customer_id, category_id))""",
+    """CREATE TABLE IF NOT EXISTS summary_watermark (
+        Name VARCHAR(64) NOT NULL PRIMARY KEY,
+        LastID BIGINT NOT NULL DEFAULT 0,
+        UpdatedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP)""",
+]
+
+# customers with no rentals yet still get a (zero) row, like the LEFT JOIN version did
+_ADD_NEW_CUSTOMERS = f"""
+    INSERT INTO {SUMMARY_TABLE} (customer_id)
+    SELECT c.customer_id FROM customer c
+    LEFT JOIN {SUMMARY_TABLE} s ON s.customer_id = c.customer_id
+    WHERE s.customer_id IS NULL"""
+_ADD_FILMS_SEEN = """
+    INSERT IGNORE INTO customer_film_seen (customer_id, film_id)
+    SELECT DISTINCT r.customer_id, i.film_id
+    FROM rental r INNER JOIN inventory i ON i.inventory_id = r.inventory_id
+    WHERE r.rental_id > %s AND r.rental_id <= %s"""
+_ADD_CATEGORIES_SEEN = """
+    INSERT IGNORE INTO customer_category_seen (customer_id, category_id)
+    SELECT DISTINCT r.customer_id, fc.category_id
+    FROM rental r
+    INNER JOIN inventory i ON i.inventory_id = r.inventory_id
+    INNER JOIN film_category fc ON fc.film_id = i.film_id
+    WHERE r.rental_id > %s AND r.rental_id <= %s"""
+# Rentals is incremented by the batch; the distinct counts are re-read from the bridge tables
+_UPDATE_SUMMARY = f"""
+    INSERT INTO {SUMMARY_TABLE} (customer_id, Rentals, DistinctFilms, DistinctCategories)
+    SELECT d.customer_id, d.n,
+           (SELECT COUNT(*) FROM customer_film_seen f WHERE f.customer_id = d.customer_id),
+           (SELECT COUNT(*) FROM customer_category_seen g WHERE g.customer_id = d.customer_id)
+    FROM (SELECT customer_id, COUNT(*) AS n FROM rental
+          WHERE rental_id > %s AND rental_id <= %s GROUP BY customer_id) d
+    ON DUPLICATE KEY UPDATE Rentals = Rentals + VALUES(Rentals),
+                            DistinctFilms = VALUES(DistinctFilms),
+                            DistinctCategories = VALUES(DistinctCategories)"""
+
+
+def ensure_interest_tables(conn):
+    cursor = conn.cursor()
+    for ddl in INTEREST_TABLES_DDL:
+        cursor.execute(ddl)
+    cursor.execute("INSERT IGNORE INTO summary_watermark (Name, LastID) VALUES (%s, 0)", (SUMMARY_TABLE,))
+    conn.commit()
+    cursor.close()
+
+
+def _lock_watermark(cursor) -> int:
+    # FOR UPDATE: two refreshes running at once would otherwise add the same rentals twice
+    cursor.execute("SELECT LastID FROM summary_watermark WHERE Name = %s FOR UPDATE", (SUMMARY_TABLE,))
+    return int(cursor.fetchone()[0])
+
+
+def refresh_interest_features(db, batch_size: int = DEFAULT_BATCH_RENTALS, rebuild: bool = False,
+                              verbose: bool = True) -> dict:
+    """Fold the rentals added since the last refresh into customer_interest_features.
+
+    Rentals past the stored rental_id watermark are applied in `batch_size`
+    id ranges, one transaction each (bridge rows, summary upsert and the new
+    watermark commit together), so an interrupted refresh resumes where it
+    stopped. With nothing new this is a couple of primary-key lookups.
+    Deleted or edited rentals are not tracked: pass rebuild=True to recompute
+    everything from scratch. Returns {"rentals", "batches", "watermark", "seconds"}.
+    """
+    started = time.perf_counter()
+    stats = {"rentals": 0, "batches": 0}
+    with db.connection() as conn:
+        ensure_interest_tables(conn)
+        cursor = conn.cursor()
+        try:
+            if rebuild:
+                for table in (SUMMARY_TABLE, "customer_film_seen", "customer_category_seen"):
+                    cursor.execute(f"DELETE FROM {table}")
+                cursor.execute("UPDATE summary_watermark SET LastID = 0 WHERE Name = %s", (SUMMARY_TABLE,))
+                conn.commit()
+            cursor.execute(_ADD_NEW_CUSTOMERS)
+            new_customers = cursor.rowcount
+            conn.commit()
+
+            cursor.execute("SELECT COALESCE(MAX(rental_id), 0) FROM rental")
+            last_id = int(cursor.fetchone()[0])
+            while True:
+                low = _lock_watermark(cursor)
+                if low >= last_id:
+                    conn.rollback()
+                    break
+                high = min(low + batch_size, last_id)
+                for sql in (_ADD_FILMS_SEEN, _ADD_CATEGORIES_SEEN, _UPDATE_SUMMARY):
+                    cursor.execute(sql, (low, high))
+                cursor.execute("SELECT COUNT(*) FROM rental WHERE rental_id > %s AND rental_id <= %s", (low, high))
+                stats["rentals"] += int(cursor.fetchone()[0])
+                cursor.execute("UPDATE summary_watermark SET LastID = %s WHERE Name = %s", (high, SUMMARY_TABLE))
+                conn.commit()
+                stats["batches"] += 1
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    if (stats["rentals"] or new_customers or rebuild) and hasattr(db, "invalidate"):
+        db.invalidate(SUMMARY_TABLE)  # CachedConnector: drop cached reads of the summary
+    stats["watermark"] = last_id
+    stats["seconds"] = time.perf_counter() - started
+    if verbose and (stats["rentals"] or new_customers):
+        print(f"{SUMMARY_TABLE}: {stats['rentals']} rentals in {stats['batches']} batches, "
+              f"{new_customers} new customers, {stats['seconds']:.2f}s (watermark rental_id {last_id})")
+    return stats
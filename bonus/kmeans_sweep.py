@@ -0,0 +1,105 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.metrics import davies_bouldin_score, silhouette_score
+from threadpoolctl import threadpool_limits
+
+FIT_SAMPLE_ROWS = 200_000
+SCORE_SAMPLE_ROWS = 5_000
+
+
+def _sample(X: np.ndarray, n: int, rng: np.random.Generator) -> np.ndarray:
+    return X if len(X) <= n else X[rng.choice(len(X), size=n, replace=False)]
+
+
+def extend_centers(X: np.ndarray, centers: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """Grow `centers` to `k` rows, picking new ones k-means++ style (far from the existing ones)."""
+    centers = [c for c in centers[:k]]
+    d2 = np.full(len(X), np.inf)
+    for c in centers:
+        d2 = np.minimum(d2, ((X - c) ** 2).sum(axis=1))
+    while len(centers) < k:
+        total = d2.sum()
+        idx = rng.integers(len(X)) if not np.isfinite(total) or total == 0 else rng.choice(len(X), p=d2 / total)
+        centers.append(X[idx])
+        d2 = np.minimum(d2, ((X - X[idx]) ** 2).sum(axis=1))
+    return np.asarray(centers, dtype=float)
+
+
+def find_knee(ks, inertia) -> int:
+    """k at the elbow: the k after which the relative inertia improvement collapses the most."""
+    ks = [int(k) for k in ks]
+    y = np.asarray(inertia, dtype=float)
+    if len(ks) < 3:
+        return ks[-1]
+    gains = (y[:-1] - y[1:]) / np.where(y[:-1] > 0, y[:-1], 1)
+    # gain into ks[i] divided by gain out of it, for every k that has a successor
+    ratios = gains[:-1] / np.maximum(gains[1:], 1e-12)
+    return ks[1 + int(np.argmax(ratios))]
+
+
+def _fit_one(X, init, k, max_iter, random_state, score_X, threads):
+    # OpenMP limits are per thread, so they are set here, in the worker thread that runs the fit
+    with threadpool_limits(limits=threads, user_api="openmp"):
+        model = KMeans(n_clusters=k, init=init, n_init=1, max_iter=max_iter, random_state=random_state)
+        model.fit(X)
+        row = {"k": k, "inertia": model.inertia_, "n_iter": model.n_iter_,
+               "silhouette": np.nan, "davies_bouldin": np.nan}
+        if k > 1:
+            labels = model.predict(score_X)
+            if len(np.unique(labels)) > 1:
+                row["silhouette"] = silhouette_score(score_X, labels)
+                row["davies_bouldin"] = davies_bouldin_score(score_X, labels)
+    return row, model.cluster_centers_
+
+
+def kmeans_sweep(X, k_min: int = 1, k_max: int = 10, max_workers: int | None = None, max_iter: int = 300,
+                 patience: int = 2, min_gain: float = 0.1, fit_sample: int = FIT_SAMPLE_ROWS,
+                 score_sample: int = SCORE_SAMPLE_ROWS, random_state: int = 42):
+    """Fit KMeans for k = k_min..k_max and return (scores DataFrame, knee k).
+
+    k values run in waves of `max_workers` concurrent fits. Every fit of a
+    wave starts from the centroids of the previous wave's largest k, extended
+    k-means++ style, so it converges in a few iterations. The sweep stops
+    early once the last `patience` steps each cut inertia by less than
+    `min_gain` (relative) - the curve has flattened past the knee.
+
+    Fits use at most `fit_sample` random rows (inertia is scaled back to the
+    full row count) and silhouette / Davies-Bouldin scores use `score_sample`
+    rows, so the cost does not grow with the table size.
+    Columns: k, inertia, n_iter, silhouette, davies_bouldin.
+    """
+    X = np.asarray(X, dtype=float)
+    rng = np.random.default_rng(random_state)
+    fit_X = _sample(X, fit_sample, rng)
+    score_X = _sample(fit_X, score_sample, rng)
+    scale = len(X) / len(fit_X)
+    max_workers = max_workers or min(4, os.cpu_count() or 1)
+    # share the cores between the concurrent fits instead of oversubscribing them
+    threads_per_fit = max(1, (os.cpu_count() or 1) // max_workers)
+
+    rows = []
+    base_centers = fit_X.mean(axis=0, keepdims=True)
+    ks = list(range(max(1, k_min), k_max + 1))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for start in range(0, len(ks), max_workers):
+            wave = ks[start:start + max_workers]
+            inits = {k: extend_centers(fit_X, base_centers, k, rng) for k in wave}
+            futures = [pool.submit(_fit_one, fit_X, inits[k], k, max_iter, random_state, score_X, threads_per_fit)
+                       for k in wave]
+            results = [f.result() for f in futures]
+            for row, _ in results:
+                row["inertia"] *= scale
+                rows.append(row)
+            base_centers = results[-1][1]
+
+            inertia = [r["inertia"] for r in rows]
+            gains = [(a - b) / a if a > 0 else 0.0 for a, b in zip(inertia, inertia[1:])]
+            if len(gains) >= patience and all(g < min_gain for g in gains[-patience:]):
+                break
+
+    scores = pd.DataFrame(rows, columns=["k", "inertia", "n_iter", "silhouette", "davies_bouldin"])
+    return scores, find_knee(scores["k"], scores["inertia"])
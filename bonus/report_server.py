@@ -0,0 +1,212 @@
+import gzip
+import hashlib
+import mimetypes
+import threading
+import time
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is always available
+    brotli = None
+
+# already-compressed formats (xlsx is a zip) are sent as they are
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+MIN_COMPRESS_BYTES = 1024
+
+
+class Report:
+    """Files produced together by one `regenerate()` call.
+
+    They count as stale once the oldest is more than `max_age` seconds old
+    (use the query cache TTL, so a report is rebuilt exactly when the cached
+    query results behind it have expired) or when one of them is missing.
+    """
+    def __init__(self, files, regenerate, max_age: float):
+        self.files = list(files)
+        self.regenerate = regenerate
+        self.max_age = max_age
+        self.lock = threading.Lock()
+
+    def is_stale(self, root: Path) -> bool:
+        try:
+            oldest = min((root / f).stat().st_mtime for f in self.files)
+        except FileNotFoundError:
+            return True
+        return time.time() - oldest > self.max_age
+
+    def refresh(self, root: Path):
+        # concurrent requests for a stale report wait for a single rebuild
+        with self.lock:
+            if not self.is_stale(root):
+                return
+            try:
+                self.regenerate()
+            except Exception as e:
+                print("[WARN] Report server: regenerating", self.files, "failed, serving the old files:", e)
+
+
+class _Entry:
+    """One file's bytes, compressed variants and ETag, valid for a given (mtime, size)."""
+    def __init__(self, path: Path, stamp):
+        self.stamp = stamp
+        self.body = path.read_bytes()
+        self.etag = hashlib.sha1(self.body).hexdigest()
+        self.content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        if self.content_type.startswith("text/") or self.content_type.endswith("javascript"):
+            self.content_type += "; charset=utf-8"
+        self.last_modified = formatdate(stamp[0] / 1e9, usegmt=True)
+        self.variants = {"identity": self.body}
+        if len(self.body) >= MIN_COMPRESS_BYTES and self.content_type.startswith(COMPRESSIBLE_TYPES):
+            self.variants["gzip"] = gzip.compress(self.body, compresslevel=6)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(self.body)
+
+    def pick(self, accept_encoding: str) -> str:
+        accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and encoding in accepted:
+                return encoding
+        return "identity"
+
+    def etag_for(self, encoding: str) -> str:
+        # strong ETags must differ per encoded representation
+        return f'"{self.etag}"' if encoding == "identity" else f'"{self.etag}-{encoding}"'
+
+
+class ReportServer:
+    """Small threaded HTTP server for the generated dashboards in `root`.
+
+    Responses carry strong ETags (304 on If-None-Match), Cache-Control and
+    gzip (or brotli, when installed) compression for text. Reports added
+    with register() are rebuilt on request once they are stale.
+    """
+    def __init__(self, root, host: str = "127.0.0.1", port: int = 8001, max_age: int = 60):
+        self.root = Path(root).resolve()
+        self.host = host
+        self.port = port
+        self.max_age = max_age
+        self.reports: dict[str, Report] = {}
+        self._entries: dict[Path, _Entry] = {}
+        self._entries_lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    def register(self, files, regenerate, max_age: float):
+        report = Report(files, regenerate, max_age)
+        for name in report.files:
+            self.reports[name] = report
+        return report
+
+    def url(self, relative_filename: str = "") -> str:
+        return f"http://{self.host}:{self.port}/" + relative_filename.replace("\\", "/")
+
+    def bind(self):
+        """Open the listening socket (raises OSError if the port is taken)."""
+        if self._httpd is None:
+            self._httpd = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+            self._httpd.daemon_threads = True
+        return self
+
+    def start(self):
+        """Serve in a background thread."""
+        self.bind()
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve in this thread until Ctrl+C."""
+        self.bind()
+        print(f"Serving {self.root} at {self.url()} (Ctrl+C to stop)")
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        if self._httpd is not None:
+            if self._thread is not None:
+                self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def resolve(self, url_path: str) -> Path | None:
+        relative = unquote(urlsplit(url_path).path).lstrip("/")
+        report = self.reports.get(relative)
+        if report is not None:
+            report.refresh(self.root)
+        path = (self.root / relative).resolve()
+        if path != self.root and self.root not in path.parents:
+            return None
+        if path.is_dir():
+            path = path / "index.html"
+        return path if path.is_file() else None
+
+    def entry(self, path: Path) -> _Entry:
+        stat = path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._entries_lock:
+            entry = self._entries.get(path)
+        if entry is None or entry.stamp != stamp:
+            entry = _Entry(path, stamp)
+            with self._entries_lock:
+                self._entries[path] = entry
+        return entry
+
+    def cache_control(self, entry: _Entry) -> str:
+        if entry.content_type.startswith(("text/html", "application/json")):
+            # pages and their data may be regenerated at any time: always revalidate (cheap thanks to the ETag)
+            return "no-cache"
+        return f"public, max-age={self.max_age}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.respond(send_body=True)
+
+            def do_HEAD(self):
+                self.respond(send_body=False)
+
+            def respond(self, send_body: bool):
+                path = server.resolve(self.path)
+                if path is None:
+                    self.send_error(HTTPStatus.NOT_FOUND)
+                    return
+                entry = server.entry(path)
+                encoding = entry.pick(self.headers.get("Accept-Encoding", ""))
+                etag = entry.etag_for(encoding)
+                if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+                    self.send_response(HTTPStatus.NOT_MODIFIED)
+                    self.send_common_headers(entry, etag)
+                    self.end_headers()
+                    return
+                body = entry.variants[encoding]
+                self.send_response(HTTPStatus.OK)
+                self.send_common_headers(entry, etag)
+                self.send_header("Content-Type", entry.content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if encoding != "identity":
+                    self.send_header("Content-Encoding", encoding)
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+
+            def send_common_headers(self, entry, etag):
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", entry.last_modified)
+                self.send_header("Cache-Control", server.cache_control(entry))
+                self.send_header("Vary", "Accept-Encoding")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
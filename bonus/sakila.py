@@ -1,16 +1,24 @@
+import html
 import json
 import os
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 import pandas as pd
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
 
-from ML_Excercises.project_retail.connectors.connector import Connector
+from bonus.excel_export import write_excel
+from bonus.html_render import group_rows, write_table
+from bonus.interest_features import refresh_interest_features
+from bonus.report_server import ReportServer
+from bonus.segmentation import SegmentationModel, update_segments
+from bonus.streaming_kmeans import ensure_label_table, stream_segmentation
+from connectors.bulk_load import bulk_upsert
+from connectors.mysql_pool import PooledConnector
+from connectors.query_cache import CachedConnector
 
 
-def fetch_customers_by_film(conn: Connector) -> pd.DataFrame:
+def fetch_customers_by_film(conn: PooledConnector) -> pd.DataFrame:
     """Return distinct customer-film pairs for rentals in sakila.
 
     Columns: FilmID, FilmTitle, CustomerID, Name, Email, Active
@@ -32,7 +40,7 @@ def fetch_customers_by_film(conn: Connector) -> pd.DataFrame:
     return conn.queryDataset(sql)
 
 
-def fetch_customers_by_category(conn: Connector) -> pd.DataFrame:
+def fetch_customers_by_category(conn: PooledConnector) -> pd.DataFrame:
     """Return distinct customers per film category.
 
     Columns: CategoryID, Category, CustomerID, Name, Email, Active
@@ -56,28 +64,45 @@ def fetch_customers_by_category(conn: Connector) -> pd.DataFrame:
     return conn.queryDataset(sql)
 
 
-def fetch_interest_features(conn: Connector) -> pd.DataFrame:
-    """Build per-customer interest metrics for clustering.
-
-    Returns columns: CustomerID, Name, Rentals, DistinctFilms, DistinctCategories
-    """
-    sql = """
+# reads the maintained summary (bonus/interest_features.py) instead of joining the whole rental history
+_INTEREST_FEATURES_SELECT = """
         SELECT
             c.customer_id AS CustomerID,
             CONCAT(c.first_name, ' ', c.last_name) AS Name,
-            COUNT(r.rental_id) AS Rentals,
-            COUNT(DISTINCT f.film_id) AS DistinctFilms,
-            COUNT(DISTINCT cat.category_id) AS DistinctCategories
-        FROM customer c
-        LEFT JOIN rental r ON r.customer_id = c.customer_id
-        LEFT JOIN inventory i ON r.inventory_id = i.inventory_id
-        LEFT JOIN film f ON i.film_id = f.film_id
-        LEFT JOIN film_category fc ON f.film_id = fc.film_id
-        LEFT JOIN category cat ON fc.category_id = cat.category_id
-        GROUP BY c.customer_id, c.first_name, c.last_name
-        ORDER BY Rentals DESC;
+            s.Rentals,
+            s.DistinctFilms,
+            s.DistinctCategories
+        FROM customer_interest_features s
+        INNER JOIN customer c ON c.customer_id = s.customer_id
     """
-    return conn.queryDataset(sql)
+INTEREST_FEATURES_SQL = _INTEREST_FEATURES_SELECT + """
+        ORDER BY s.Rentals DESC;
+    """
+# primary-key order, no sort: for streaming over every customer
+INTEREST_FEATURES_SCAN_SQL = _INTEREST_FEATURES_SELECT
+# only customers whose features may have changed since a watermark (new/updated customer or summary row)
+CHANGED_INTEREST_FEATURES_SQL = _INTEREST_FEATURES_SELECT + """
+        WHERE s.UpdatedAt > %s OR c.last_update > %s;
+    """
+SEGMENT_WATERMARK_SQL = """
+        SELECT GREATEST(COALESCE((SELECT MAX(last_update) FROM customer), '1970-01-01'),
+                        COALESCE((SELECT MAX(UpdatedAt) FROM customer_interest_features), '1970-01-01')) AS Watermark;
+    """
+INTEREST_FEATURE_COLUMNS = ["Rentals", "DistinctFilms", "DistinctCategories"]
+SEGMENT_MODEL_PATH = Path(__file__).parent / ".cache" / "sakila_segments.json"
+
+
+def fetch_interest_features(conn: PooledConnector) -> pd.DataFrame:
+    """Build per-customer interest metrics for clustering.
+
+    Returns columns: CustomerID, Name, Rentals, DistinctFilms, DistinctCategories
+    """
+    try:
+        refresh_interest_features(conn)  # fold in rentals added since the last run
+    except Exception as e:
+        print("[ERROR] Cập nhật bảng customer_interest_features thất bại:", e)
+        return None
+    return conn.queryDataset(INTEREST_FEATURES_SQL)
 
 
 def print_grouped(df: pd.DataFrame, group_col: str, key_cols: list[str]):
@@ -87,356 +112,64 @@ def print_grouped(df: pd.DataFrame, group_col: str, key_cols: list[str]):
         print(g[key_cols].to_string(index=False))
 
 
-def write_customers_by_film_html(df: pd.DataFrame, out_path: Path):
-    # Prepare JSON rows
-    rows = df.to_dict(orient="records")
-    films = (
-        df.groupby("FilmTitle")
-        .size()
-        .sort_values(ascending=False)
-        .reset_index(name="Count")
-        .to_dict(orient="records")
-    )
-
-    html = f"""
-<!DOCTYPE html>
-<html lang=\"en\">
-<head>
-  <meta charset=\"UTF-8\" />
-  <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />
-  <title>Sakila - Customers by Film</title>
-  <link href=\"https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css\" rel=\"stylesheet\" />
-  <style>
-    body {{ background-color: #121212; color: #e0e0e0; }}
-    .table thead th {{ color: #9bd; }}
-    .card {{ background-color: #1e1e1e; }}
-    .form-select, .form-control {{ background-color: #1a1a1a; color: #e0e0e0; }}
-  </style>
-</head>
-<body class=\"p-3\">
-  <div class=\"container\">
-    <h3 class=\"mb-3\">Sakila – Customers by Film</h3>
-    <div class=\"row g-2 mb-3\">
-      <div class=\"col-md-6\">
-        <label class=\"form-label\">Select film</label>
-        <select id=\"filmSelect\" class=\"form-select\"></select>
-      </div>
-      <div class=\"col-md-6\">
-        <label class=\"form-label\">Search customers</label>
-        <input id=\"searchInput\" type=\"text\" class=\"form-control\" placeholder=\"Name or Email\" />
-      </div>
-    </div>
-    <div class=\"mb-2\" id=\"countInfo\"></div>
-    <div class=\"card\">
-      <div class=\"card-body\">
-        <div class=\"table-responsive\">
-          <table class=\"table table-dark table-striped table-hover\" id=\"customersTable\">
-            <thead>
-              <tr>
-                <th>Film</th><th>CustomerID</th><th>Name</th><th>Email</th><th>Active</th>
-              </tr>
-            </thead>
-            <tbody></tbody>
-          </table>
-        </div>
-      </div>
-    </div>
-  </div>
+FILM_ROW_COLUMNS = ["CustomerID", "Name", "Email", "Active"]
 
-  <script>
-    const rows = {json.dumps(rows)};
-    const films = {json.dumps(films)};
-
-    const filmSelect = document.getElementById('filmSelect');
-    const searchInput = document.getElementById('searchInput');
-    const tbody = document.querySelector('#customersTable tbody');
-    const countInfo = document.getElementById('countInfo');
-
-    function populateFilms() {{
-      filmSelect.innerHTML = films.map(f => `<option value="${{f.FilmTitle}}">${{f.FilmTitle}} (customers: ${{f.Count}})</option>`).join('');
-    }}
-
-    function render() {{
-      const film = filmSelect.value || (films[0] ? films[0].FilmTitle : '');
-      const term = searchInput.value.toLowerCase();
-      const filtered = rows.filter(r => r.FilmTitle === film && (
-        r.Name.toLowerCase().includes(term) || (r.Email || '').toLowerCase().includes(term)
-      ));
-      tbody.innerHTML = filtered.map(r => `<tr><td>${{r.FilmTitle}}</td><td>${{r.CustomerID}}</td><td>${{r.Name}}</td><td>${{r.Email || ''}}</td><td>${{r.Active}}</td></tr>`).join('');
-      const totalForFilm = rows.filter(r => r.FilmTitle === film).length;
-      countInfo.textContent = `Film: ${{film}} — showing ${{filtered.length}} of ${{totalForFilm}} customers`;
-    }}
-
-    populateFilms();
-    render();
-    filmSelect.addEventListener('change', render);
-    searchInput.addEventListener('input', render);
-  </script>
-</body>
-</html>
-"""
 
-    out_path.write_text(html, encoding="utf-8")
+def _columnar(df: pd.DataFrame, columns: list[str]) -> dict:
+    """{column: list of values} with NaN as null - much smaller than one object per row."""
+    return {c: df[c].astype(object).where(df[c].notna(), None).tolist() for c in columns}
 
 
-def write_customers_by_category_html(df: pd.DataFrame, out_path: Path):
-    categories = (
-        df.groupby(["CategoryID", "Category"]).size().reset_index(name="Count").sort_values("Category")
-    )
-    # Build per-category rows
-    rows_by_cat: dict[int, list[dict]] = {}
-    for _, r in df.iterrows():
-        rows_by_cat.setdefault(int(r["CategoryID"]), []).append(
-            {
-                "CustomerID": int(r["CustomerID"]),
-                "Name": r["Name"],
-                "Email": r.get("Email", ""),
-                "Active": int(r["Active"]),
-            }
-        )
-
-    html = f"""
-<!DOCTYPE html>
-<html lang=\"en\">
-<head>
-  <meta charset=\"UTF-8\" />
-  <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />
-  <title>Sakila - Customers by Category</title>
-  <link href=\"https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css\" rel=\"stylesheet\" />
-  <style>
-    body {{ background-color: #121212; color: #e0e0e0; }}
-    .table thead th {{ color: #9bd; }}
-    .card {{ background-color: #1e1e1e; }}
-    .nav-link {{ color: #e0e0e0; }}
-  </style>
-</head>
-<body class=\"p-3\">
-  <div class=\"container\">
-    <h3 class=\"mb-3\">Sakila – Customers by Category</h3>
-    <ul class=\"nav nav-pills mb-3\" id=\"catTabs\" role=\"tablist\">
-      {''.join([f'<li class="nav-item" role="presentation"><button class="nav-link {'active' if i==0 else ''}" data-bs-toggle="tab" data-bs-target="#cat-{row.CategoryID}" type="button" role="tab">{row.Category} ({row.Count})</button></li>' for i, row in categories.iterrows()])}
-    </ul>
-    <div class=\"tab-content\">
-      {''.join([f'<div class="tab-pane fade {'show active' if i==0 else ''}" id="cat-{row.CategoryID}" role="tabpanel">\n  <div class="card"><div class="card-body">\n    <div class="table-responsive">\n      <table class="table table-dark table-striped table-hover">\n        <thead><tr><th>CustomerID</th><th>Name</th><th>Email</th><th>Active</th></tr></thead>\n        <tbody>' + ''.join([f'<tr><td>{r['CustomerID']}</td><td>{r['Name']}</td><td>{r['Email']}</td><td>{r['Active']}</td></tr>' for r in rows_by_cat.get(int(row.CategoryID), [])]) + '</tbody>\n      </table>\n    </div>\n  </div></div>\n</div>' for i, row in categories.iterrows()])}
-    </div>
-  </div>
-  <script src=\"https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/bootstrap.bundle.min.js\"></script>
-</body>
-</html>
-"""
-
-    out_path.write_text(html, encoding="utf-8")
-
-
-def write_clusters_html(df: pd.DataFrame, out_path: Path):
-    clusters = (
-        df.groupby("Cluster").size().reset_index(name="Count").sort_values("Cluster")
-    )
-    rows_by_cluster: dict[int, list[dict]] = {}
-    for _, r in df.iterrows():
-        rows_by_cluster.setdefault(int(r["Cluster"]), []).append(
-            {
-                "CustomerID": int(r["CustomerID"]),
-                "Name": r["Name"],
-                "Rentals": int(r["Rentals"]),
-                "DistinctFilms": int(r["DistinctFilms"]),
-                "DistinctCategories": int(r["DistinctCategories"]),
-            }
-        )
-
-    html = f"""
-<!DOCTYPE html>
-<html lang=\"en\">
-<head>
-  <meta charset=\"UTF-8\" />
-  <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />
-  <title>Sakila - Customers by Interest Clusters</title>
-  <link href=\"https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css\" rel=\"stylesheet\" />
-  <style>
-    body {{ background-color: #121212; color: #e0e0e0; }}
-    .table thead th {{ color: #9bd; }}
-    .card {{ background-color: #1e1e1e; }}
-    .nav-link {{ color: #e0e0e0; }}
-  </style>
-</head>
-<body class=\"p-3\">
-  <div class=\"container\">
-    <h3 class=\"mb-3\">Sakila – Customers by Interest Clusters</h3>
-    <ul class=\"nav nav-pills mb-3\" id=\"clusterTabs\" role=\"tablist\">
-      {''.join([f'<li class="nav-item" role="presentation"><button class="nav-link {'active' if i==0 else ''}" data-bs-toggle="tab" data-bs-target="#cluster-{row.Cluster}" type="button" role="tab">Cluster {row.Cluster} ({row.Count})</button></li>' for i, row in clusters.iterrows()])}
-    </ul>
-    <div class=\"tab-content\">
-      {''.join([f'<div class="tab-pane fade {'show active' if i==0 else ''}" id="cluster-{row.Cluster}" role="tabpanel">\n  <div class="card"><div class="card-body">\n    <div class="table-responsive">\n      <table class="table table-dark table-striped table-hover">\n        <thead><tr><th>CustomerID</th><th>Name</th><th>Rentals</th><th>DistinctFilms</th><th>DistinctCategories</th></tr></thead>\n        <tbody>' + ''.join([f'<tr><td>{r['CustomerID']}</td><td>{r['Name']}</td><td>{r['Rentals']}</td><td>{r['DistinctFilms']}</td><td>{r['DistinctCategories']}</td></tr>' for r in rows_by_cluster.get(int(row.Cluster), [])]) + '</tbody>\n      </table>\n    </div>\n  </div></div>\n</div>' for i, row in clusters.iterrows()])}
-    </div>
-  </div>
-  <script src=\"https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/bootstrap.bundle.min.js\"></script>
-</body>
-</html>
-"""
+def _script_json(obj) -> str:
+    """Compact JSON that is safe to embed inside a <script> element."""
+    return json.dumps(obj, separators=(",", ":")).replace("</", "<\\/")
 
-    out_path.write_text(html, encoding="utf-8")
 
+def film_index(df: pd.DataFrame) -> tuple[pd.DataFrame, list[dict]]:
+    """Sort rows by film (most customers first) and return (sorted rows, index).
 
-def export_excel(df: pd.DataFrame, path: Path, sheet_name: str):
-    with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
-        df.to_excel(writer, sheet_name=sheet_name, index=False)
-
-
-def cluster_customers(features_df: pd.DataFrame, k: int = 4) -> pd.DataFrame:
-    X = features_df[["Rentals", "DistinctFilms", "DistinctCategories"]].fillna(0).values
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    km = KMeans(n_clusters=k, n_init=10, random_state=42)
-    labels = km.fit_predict(X_scaled)
-    out = features_df.copy()
-    out["Cluster"] = labels
-    return out
-
-
-def open_on_server(relative_filename: str):
-    base = "http://127.0.0.1:8000/"
-    url = base + relative_filename.replace("\\", "/")
-    try:
-        webbrowser.open(url, new=2)
-    except Exception:
-        # Fallback to file path
-        webbrowser.open(str(Path(__file__).parent / relative_filename), new=2)
-
-
-def main():
-    # Always connect to sakila (use credentials from test_connection.py)
-    conn = Connector(server="localhost", port=3306, database="sakila", username="root", password="123456")
-    if conn.connect() is None:
-        print("[ERROR] Không thể kết nối tới MySQL 'sakila'. Kiểm tra server/username/password trong connectors/connector.py")
-        return
-
-    tests_dir = Path(__file__).parent
-    film_html = tests_dir / "sakila_customers_by_film.html"
-    cat_html = tests_dir / "sakila_customers_by_category.html"
-    cluster_html = tests_dir / "sakila_customers_by_interest_clusters.html"
-
-    print("Fetching customers by film ...")
-    df_film = fetch_customers_by_film(conn)
-    if df_film is None:
-        print("[ERROR] Truy vấn khách theo phim thất bại.")
-        return
-    print_grouped(df_film, "FilmTitle", ["CustomerID", "Name", "Email", "Active"])
-    print(f"\nWriting HTML: {film_html}")
-    write_customers_by_film_html(df_film, film_html)
-    export_excel(df_film, tests_dir / "sakila_customers_by_film.xlsx", "CustomersByFilm")
-
-    print("\nFetching customers by category ...")
-    df_cat = fetch_customers_by_category(conn)
-    if df_cat is None:
-        print("[ERROR] Truy vấn khách theo category thất bại.")
-        return
-    print_grouped(df_cat, "Category", ["CustomerID", "Name", "Email", "Active"])
-    print(f"\nWriting HTML: {cat_html}")
-    write_customers_by_category_html(df_cat, cat_html)
-    export_excel(df_cat, tests_dir / "sakila_customers_by_category.xlsx", "CustomersByCategory")
-
-    print("\nComputing interest features and clustering ...")
-    features = fetch_interest_features(conn)
-    if features is None:
-        print("[ERROR] Truy vấn đặc trưng quan tâm thất bại.")
-        return
-    clustered = cluster_customers(features, k=4)
-    print("Cluster sizes:")
-    print(clustered.groupby("Cluster").size().to_string())
-    print(f"\nWriting HTML: {cluster_html}")
-    write_clusters_html(clustered, cluster_html)
-    export_excel(clustered, tests_dir / "sakila_customers_clusters.xlsx", "Clusters")
-
-    # Open category page by default for easier overview
-    open_on_server("sakila_customers_by_category.html")
-
-
-if __name__ == "__main__":
-    main()
-import json
-import os
-import webbrowser
-from pathlib import Path
-
-import pandas as pd
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-
-from ML_Excercises.project_retail.connectors.connector import Connector
-
-
-def fetch_customers_by_film(conn: Connector) -> pd.DataFrame:
-    sql = """
-        SELECT DISTINCT
-            f.film_id AS FilmID,
-            f.title AS FilmTitle,
-            c.customer_id AS CustomerID,
-            CONCAT(c.first_name, ' ', c.last_name) AS Name,
-            c.email AS Email,
-            c.active AS Active
-        FROM rental r
-        INNER JOIN inventory i ON r.inventory_id = i.inventory_id
-        INNER JOIN film f ON i.film_id = f.film_id
-        INNER JOIN customer c ON r.customer_id = c.customer_id
-        ORDER BY f.title, c.customer_id;
-    """
-    return conn.queryDataset(sql)
-
-
-def fetch_customers_by_category(conn: Connector) -> pd.DataFrame:
-    sql = """
-        SELECT DISTINCT
-            cat.category_id AS CategoryID,
-            cat.name AS Category,
-            c.customer_id AS CustomerID,
-            CONCAT(c.first_name, ' ', c.last_name) AS Name,
-            c.email AS Email,
-            c.active AS Active
-        FROM rental r
-        INNER JOIN inventory i ON r.inventory_id = i.inventory_id
-        INNER JOIN film f ON i.film_id = f.film_id
-        INNER JOIN film_category fc ON f.film_id = fc.film_id
-        INNER JOIN category cat ON fc.category_id = cat.category_id
-        INNER JOIN customer c ON r.customer_id = c.customer_id
-        ORDER BY cat.name, c.customer_id;
+    Each index entry holds FilmID, FilmTitle, Count and Offset, the position of
+    the film's first row in the sorted rows, so one film is a single slice.
     """
-    return conn.queryDataset(sql)
-
-
-def fetch_interest_features(conn: Connector) -> pd.DataFrame:
-    sql = """
-        SELECT
-            c.customer_id AS CustomerID,
-            CONCAT(c.first_name, ' ', c.last_name) AS Name,
-            COUNT(r.rental_id) AS Rentals,
-            COUNT(DISTINCT f.film_id) AS DistinctFilms,
-            COUNT(DISTINCT cat.category_id) AS DistinctCategories
-        FROM customer c
-        LEFT JOIN rental r ON r.customer_id = c.customer_id
-        LEFT JOIN inventory i ON r.inventory_id = i.inventory_id
-        LEFT JOIN film f ON i.film_id = f.film_id
-        LEFT JOIN film_category fc ON f.film_id = fc.film_id
-        LEFT JOIN category cat ON fc.category_id = cat.category_id
-        GROUP BY c.customer_id, c.first_name, c.last_name
-        ORDER BY Rentals DESC;
+    counts = df.groupby(["FilmID", "FilmTitle"]).size().reset_index(name="Count")
+    counts = counts.sort_values("Count", ascending=False, kind="stable").reset_index(drop=True)
+    counts["Offset"] = counts["Count"].cumsum() - counts["Count"]
+    rank = pd.Series(range(len(counts)), index=counts["FilmID"]).loc[df["FilmID"]].to_numpy()
+    rows = df.iloc[rank.argsort(kind="stable")]
+    films = [{"FilmID": int(r.FilmID), "FilmTitle": r.FilmTitle, "Count": int(r.Count), "Offset": int(r.Offset)}
+             for r in counts.itertuples(index=False)]
+    return rows, films
+
+
+def write_film_shards(rows: pd.DataFrame, films: list[dict], data_dir: Path):
+    """Write one columnar JSON file per film plus index.json (film -> file, count, offset)."""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    for film in films:
+        film["File"] = f"film_{film['FilmID']}.json"
+        shard = rows.iloc[film["Offset"]:film["Offset"] + film["Count"]]
+        (data_dir / film["File"]).write_text(json.dumps(_columnar(shard, FILM_ROW_COLUMNS), separators=(",", ":")),
+                                             encoding="utf-8")
+    (data_dir / "index.json").write_text(json.dumps(films, separators=(",", ":")), encoding="utf-8")
+
+
+def write_customers_by_film_html(df: pd.DataFrame, out_path: Path, sharded: bool = False):
+    """Write the customers-by-film page.
+
+    Rows are grouped by film behind a film -> offset index, so the page only
+    ever filters the selected film's rows. With `sharded` the rows go to
+    <name>_data/film_<id>.json files (plus index.json) next to the page and
+    are fetched per film on demand; the page must then be opened over HTTP.
+    Otherwise they are embedded once as columnar arrays.
     """
-    return conn.queryDataset(sql)
-
-
-def print_grouped(df: pd.DataFrame, group_col: str, key_cols: list[str]):
-    groups = df.groupby(group_col)
-    for key, g in groups:
-        print(f"\n=== {group_col}: {key} (customers: {g.shape[0]}) ===")
-        print(g[key_cols].to_string(index=False))
-
-
-def write_customers_by_film_html(df: pd.DataFrame, out_path: Path):
-    rows = df.to_dict(orient="records")
-    films = (
-        df.groupby("FilmTitle").size().sort_values(ascending=False).reset_index(name="Count").to_dict(orient="records")
-    )
-
-    html = f"""
+    rows, films = film_index(df)
+    if sharded:
+        data_dir = out_path.parent / f"{out_path.stem}_data"
+        write_film_shards(rows, films, data_dir)
+        data_js = f"const dataDir={_script_json(data_dir.name + '/')};const embedded=null;let films=[];"
+    else:
+        data_js = f"const dataDir=null;const embedded={_script_json(_columnar(rows, FILM_ROW_COLUMNS))};let films={_script_json(films)};"
+
+    html_page = f"""
 <!DOCTYPE html><html lang=\"en\"><head>
   <meta charset=\"UTF-8\" />
   <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />
@@ -456,119 +189,106 @@ def write_customers_by_film_html(df: pd.DataFrame, out_path: Path):
   </div></div></div>
 </div>
 <script>
-const rows={json.dumps(rows)};const films={json.dumps(films)};
+{data_js}
 const filmSelect=document.getElementById('filmSelect');const searchInput=document.getElementById('searchInput');const tbody=document.querySelector('#customersTable tbody');const countInfo=document.getElementById('countInfo');
-function populateFilms(){{filmSelect.innerHTML=films.map(f=>`<option value="${{f.FilmTitle}}">${{f.FilmTitle}} (customers: ${{f.Count}})</option>`).join('')}}
-function render(){{const film=filmSelect.value||(films[0]?films[0].FilmTitle:'');const term=searchInput.value.toLowerCase();const filtered=rows.filter(r=>r.FilmTitle===film&&(r.Name.toLowerCase().includes(term)||String(r.Email||'').toLowerCase().includes(term)));tbody.innerHTML=filtered.map(r=>`<tr><td>${{r.FilmTitle}}</td><td>${{r.CustomerID}}</td><td>${{r.Name}}</td><td>${{r.Email || ''}}</td><td>${{r.Active}}</td></tr>`).join('');const totalForFilm=rows.filter(r=>r.FilmTitle===film).length;countInfo.textContent=`Film: ${{film}} — showing ${{filtered.length}} of ${{totalForFilm}} customers`}}
-populateFilms();render();filmSelect.addEventListener('change',render);searchInput.addEventListener('input',render);
+const esc=v=>String(v??'').replace(/[&<>"']/g,c=>({{'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;',"'":'&#39;'}})[c]);
+const loaded=new Map();
+function sliceFilm(f){{const cols={{}};for(const k in embedded)cols[k]=embedded[k].slice(f.Offset,f.Offset+f.Count);return Promise.resolve(cols)}}
+function loadFilm(f){{if(!loaded.has(f.FilmID)){{const p=embedded?sliceFilm(f):fetch(dataDir+f.File).then(r=>r.json());loaded.set(f.FilmID,p.then(cols=>({{cols,text:cols.Name.map((n,i)=>(String(n??'')+'\\n'+String(cols.Email[i]??'')).toLowerCase())}})))}}return loaded.get(f.FilmID)}}
+function populateFilms(){{filmSelect.innerHTML=films.map((f,i)=>`<option value="${{i}}">${{esc(f.FilmTitle)}} (customers: ${{f.Count}})</option>`).join('')}}
+let renderSeq=0;
+async function render(){{const f=films[Number(filmSelect.value)||0];if(!f){{tbody.innerHTML='';return}}const seq=++renderSeq;const term=searchInput.value.toLowerCase();const {{cols,text}}=await loadFilm(f);if(seq!==renderSeq)return;const out=[];for(let i=0;i<text.length;i++){{if(term&&!text[i].includes(term))continue;out.push(`<tr><td>${{esc(f.FilmTitle)}}</td><td>${{cols.CustomerID[i]}}</td><td>${{esc(cols.Name[i])}}</td><td>${{esc(cols.Email[i])}}</td><td>${{cols.Active[i]}}</td></tr>`)}}tbody.innerHTML=out.join('');countInfo.textContent=`Film: ${{f.FilmTitle}} — showing ${{out.length}} of ${{f.Count}} customers`}}
+function fail(e){{countInfo.textContent='Cannot load film data ('+e+'). Open this page through the report HTTP server.'}}
+(dataDir?fetch(dataDir+'index.json').then(r=>r.json()).then(idx=>{{films=idx}}):Promise.resolve()).then(()=>{{populateFilms();filmSelect.addEventListener('change',()=>render().catch(fail));searchInput.addEventListener('input',()=>render().catch(fail));return render()}}).catch(fail);
 </script></body></html>
 """
-    out_path.write_text(html, encoding="utf-8")
+    out_path.write_text(html_page, encoding="utf-8")
 
 
 def write_customers_by_category_html(df: pd.DataFrame, out_path: Path):
     categories = df.groupby(["CategoryID", "Category"]).size().reset_index(name="Count").sort_values("Category")
-    rows_by_cat: dict[int, list[dict]] = {}
-    for _, r in df.iterrows():
-        rows_by_cat.setdefault(int(r["CategoryID"]), []).append({
-            "CustomerID": int(r["CustomerID"]),
-            "Name": r["Name"],
-            "Email": r.get("Email", ""),
-            "Active": int(r["Active"]),
-        })
-
-    def table_for(cat_id: int) -> str:
-        rows = rows_by_cat.get(cat_id, [])
-        body = "".join([f"<tr><td>{r['CustomerID']}</td><td>{r['Name']}</td><td>{r['Email']}</td><td>{r['Active']}</td></tr>" for r in rows])
-        return f"<table class=\"table table-dark table-striped table-hover\"><thead><tr><th>CustomerID</th><th>Name</th><th>Email</th><th>Active</th></tr></thead><tbody>{body}</tbody></table>"
-
-    tabs = []
-    panes = []
-    for i, row in enumerate(categories.itertuples(index=False)):
-        active = "active" if i == 0 else ""
-        show = "show active" if i == 0 else ""
-        tabs.append(f"<li class=\"nav-item\" role=\"presentation\"><button class=\"nav-link {active}\" data-bs-toggle=\"tab\" data-bs-target=\"#cat-{row.CategoryID}\" type=\"button\" role=\"tab\">{row.Category} ({row.Count})</button></li>")
-        panes.append(f"<div class=\"tab-pane fade {show}\" id=\"cat-{row.CategoryID}\" role=\"tabpanel\"><div class=\"card\"><div class=\"card-body\">{table_for(int(row.CategoryID))}</div></div></div>")
-
-    html = f"""
+    columns = ["CustomerID", "Name", "Email", "Active"]
+    rows_by_cat = group_rows(df, "CategoryID", columns)
+
+    with out_path.open("w", encoding="utf-8") as fh:
+        fh.write("""
 <!DOCTYPE html><html lang=\"en\"><head>
   <meta charset=\"UTF-8\" />
   <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />
   <title>Sakila - Customers by Category</title>
   <link href=\"https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css\" rel=\"stylesheet\" />
-  <style>body{{background:#121212;color:#e0e0e0}}.card{{background:#1e1e1e}}</style>
+  <style>body{background:#121212;color:#e0e0e0}.card{background:#1e1e1e}</style>
 </head><body class=\"p-3\"><div class=\"container\">
   <h3 class=\"mb-3\">Sakila – Customers by Category</h3>
-  <ul class=\"nav nav-pills mb-3\" id=\"catTabs\" role=\"tablist\">{''.join(tabs)}</ul>
-  <div class=\"tab-content\">{''.join(panes)}</div>
+  <ul class=\"nav nav-pills mb-3\" id=\"catTabs\" role=\"tablist\">""")
+        for i, row in enumerate(categories.itertuples(index=False)):
+            active = "active" if i == 0 else ""
+            fh.write(f"<li class=\"nav-item\" role=\"presentation\"><button class=\"nav-link {active}\" data-bs-toggle=\"tab\" data-bs-target=\"#cat-{row.CategoryID}\" type=\"button\" role=\"tab\">{html.escape(str(row.Category))} ({row.Count})</button></li>")
+        fh.write("</ul>\n  <div class=\"tab-content\">")
+        # panes are streamed to the file one table at a time
+        for i, row in enumerate(categories.itertuples(index=False)):
+            show = "show active" if i == 0 else ""
+            fh.write(f"<div class=\"tab-pane fade {show}\" id=\"cat-{row.CategoryID}\" role=\"tabpanel\"><div class=\"card\"><div class=\"card-body\">")
+            write_table(fh, rows_by_cat.get(row.CategoryID, []), columns)
+            fh.write("</div></div></div>")
+        fh.write("""</div>
 </div>
 <script src=\"https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/bootstrap.bundle.min.js\"></script>
 </body></html>
-"""
-    out_path.write_text(html, encoding="utf-8")
+""")
 
 
 def write_clusters_html(df: pd.DataFrame, out_path: Path):
     clusters = df.groupby("Cluster").size().reset_index(name="Count").sort_values("Cluster")
-    rows_by_cluster: dict[int, list[dict]] = {}
-    for _, r in df.iterrows():
-        rows_by_cluster.setdefault(int(r["Cluster"]), []).append({
-            "CustomerID": int(r["CustomerID"]),
-            "Name": r["Name"],
-            "Rentals": int(r["Rentals"]),
-            "DistinctFilms": int(r["DistinctFilms"]),
-            "DistinctCategories": int(r["DistinctCategories"]),
-        })
-
-    def table_for(cid: int) -> str:
-        rows = rows_by_cluster.get(cid, [])
-        body = "".join([f"<tr><td>{r['CustomerID']}</td><td>{r['Name']}</td><td>{r['Rentals']}</td><td>{r['DistinctFilms']}</td><td>{r['DistinctCategories']}</td></tr>" for r in rows])
-        return f"<table class=\"table table-dark table-striped table-hover\"><thead><tr><th>CustomerID</th><th>Name</th><th>Rentals</th><th>DistinctFilms</th><th>DistinctCategories</th></tr></thead><tbody>{body}</tbody></table>"
-
-    tabs = []
-    panes = []
-    for i, row in enumerate(clusters.itertuples(index=False)):
-        active = "active" if i == 0 else ""
-        show = "show active" if i == 0 else ""
-        tabs.append(f"<li class=\"nav-item\" role=\"presentation\"><button class=\"nav-link {active}\" data-bs-toggle=\"tab\" data-bs-target=\"#cluster-{int(row.Cluster)}\" type=\"button\" role=\"tab\">Cluster {int(row.Cluster)} ({int(row.Count)})</button></li>")
-        panes.append(f"<div class=\"tab-pane fade {show}\" id=\"cluster-{int(row.Cluster)}\" role=\"tabpanel\"><div class=\"card\"><div class=\"card-body\">{table_for(int(row.Cluster))}</div></div></div>")
-
-    html = f"""
+    columns = ["CustomerID", "Name", "Rentals", "DistinctFilms", "DistinctCategories"]
+    rows_by_cluster = group_rows(df, "Cluster", columns)
+
+    with out_path.open("w", encoding="utf-8") as fh:
+        fh.write("""
 <!DOCTYPE html><html lang=\"en\"><head>
   <meta charset=\"UTF-8\" />
   <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />
   <title>Sakila - Customers by Interest Clusters</title>
   <link href=\"https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css\" rel=\"stylesheet\" />
-  <style>body{{background:#121212;color:#e0e0e0}}.card{{background:#1e1e1e}}</style>
+  <style>body{background:#121212;color:#e0e0e0}.card{background:#1e1e1e}</style>
 </head><body class=\"p-3\"><div class=\"container\">
   <h3 class=\"mb-3\">Sakila – Customers by Interest Clusters</h3>
-  <ul class=\"nav nav-pills mb-3\" id=\"clusterTabs\" role=\"tablist\">{''.join(tabs)}</ul>
-  <div class=\"tab-content\">{''.join(panes)}</div>
+  <ul class=\"nav nav-pills mb-3\" id=\"clusterTabs\" role=\"tablist\">""")
+        for i, row in enumerate(clusters.itertuples(index=False)):
+            active = "active" if i == 0 else ""
+            fh.write(f"<li class=\"nav-item\" role=\"presentation\"><button class=\"nav-link {active}\" data-bs-toggle=\"tab\" data-bs-target=\"#cluster-{int(row.Cluster)}\" type=\"button\" role=\"tab\">Cluster {int(row.Cluster)} ({int(row.Count)})</button></li>")
+        fh.write("</ul>\n  <div class=\"tab-content\">")
+        for i, row in enumerate(clusters.itertuples(index=False)):
+            show = "show active" if i == 0 else ""
+            fh.write(f"<div class=\"tab-pane fade {show}\" id=\"cluster-{int(row.Cluster)}\" role=\"tabpanel\"><div class=\"card\"><div class=\"card-body\">")
+            write_table(fh, rows_by_cluster.get(row.Cluster, []), columns)
+            fh.write("</div></div></div>")
+        fh.write("""</div>
 </div>
 <script src=\"https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/bootstrap.bundle.min.js\"></script>
 </body></html>
-"""
-    out_path.write_text(html, encoding="utf-8")
+""")
 
 
 def export_excel(df: pd.DataFrame, path: Path, sheet_name: str):
-    with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
-        df.to_excel(writer, sheet_name=sheet_name, index=False)
+    write_excel(path, [(sheet_name, df)])
 
 
-def cluster_customers(features_df: pd.DataFrame, k: int = 4) -> pd.DataFrame:
-    X = features_df[["Rentals", "DistinctFilms", "DistinctCategories"]].fillna(0).values
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    km = KMeans(n_clusters=k, n_init=10, random_state=42)
-    labels = km.fit_predict(X_scaled)
+def cluster_customers(features_df: pd.DataFrame, k: int = 4, model_path: Path = SEGMENT_MODEL_PATH) -> pd.DataFrame:
+    # Read-only use of the saved segmentation, so the report shows the same cluster IDs as customer_segment.
+    # Only update_customer_segments / segment_customers_streaming refit it (they rewrite every label);
+    # without a usable model, or after drift, the report gets its own fit (cached by bonus.clustering).
+    model = SegmentationModel.load(model_path)
+    if model is None or not model.matches(INTEREST_FEATURE_COLUMNS, k) or model.drift(features_df)["drifted"]:
+        model = SegmentationModel.fit(features_df, INTEREST_FEATURE_COLUMNS, k)
+    labels = model.assign_clusters(features_df, track=False)
     out = features_df.copy()
     out["Cluster"] = labels
     return out
 
 
-def open_on_server(relative_filename: str):
-    base = "http://127.0.0.1:8001/"  # use 8001 preview server
+def open_on_server(relative_filename: str, server: ReportServer | None = None):
+    base = server.url() if server is not None else "http://127.0.0.1:8001/"  # use 8001 preview server
     url = base + relative_filename.replace("\\", "/")
     try:
         webbrowser.open(url, new=2)
@@ -576,51 +296,194 @@ def open_on_server(relative_filename: str):
         webbrowser.open(str(Path(__file__).parent / relative_filename), new=2)
 
 
-def main():
-    conn = Connector(database="sakila")
-    if conn.connect() is None:
-        print("[ERROR] Không thể kết nối tới MySQL 'sakila'. Kiểm tra connectors/connector.py")
-        return
+# name -> (fetch function, error message), in the order the sequential mode runs them
+FETCHERS = {
+    "film": (fetch_customers_by_film, "[ERROR] Truy vấn khách theo phim thất bại."),
+    "category": (fetch_customers_by_category, "[ERROR] Truy vấn khách theo category thất bại."),
+    "interest": (fetch_interest_features, "[ERROR] Truy vấn đặc trưng quan tâm thất bại."),
+}
 
-    tests_dir = Path(__file__).parent
-    film_html = tests_dir / "sakila_customers_by_film.html"
-    cat_html = tests_dir / "sakila_customers_by_category.html"
-    cluster_html = tests_dir / "sakila_customers_by_interest_clusters.html"
-
-    print("Fetching customers by film ...")
-    df_film = fetch_customers_by_film(conn)
-    if df_film is None:
-        print("[ERROR] Truy vấn khách theo phim thất bại.")
+
+def iter_fetch_results(conn: PooledConnector, concurrent: bool = True, names=None):
+    """Yield (name, DataFrame) for every query in FETCHERS (or only those in `names`).
+
+    In concurrent mode the queries run in a thread pool, each on its own pooled
+    connection, and results are yielded as soon as each one finishes so the
+    caller can render it while the slower queries are still running.
+    """
+    fetchers = {name: f for name, f in FETCHERS.items() if names is None or name in names}
+    if not concurrent:
+        for name, (fetch, _) in fetchers.items():
+            yield name, fetch(conn)
         return
+    with ThreadPoolExecutor(max_workers=len(fetchers)) as pool:
+        futures = {pool.submit(fetch, conn): name for name, (fetch, _) in fetchers.items()}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def render_film_report(df_film: pd.DataFrame, out_dir: Path):
+    film_html = out_dir / "sakila_customers_by_film.html"
     print_grouped(df_film, "FilmTitle", ["CustomerID", "Name", "Email", "Active"])
     print(f"\nWriting HTML: {film_html}")
-    write_customers_by_film_html(df_film, film_html)
-    export_excel(df_film, tests_dir / "sakila_customers_by_film.xlsx", "CustomersByFilm")
+    # one JSON shard per film, fetched by the page on demand (served by open_on_server's HTTP server)
+    write_customers_by_film_html(df_film, film_html, sharded=True)
+    export_excel(df_film, out_dir / "sakila_customers_by_film.xlsx", "CustomersByFilm")
 
-    print("\nFetching customers by category ...")
-    df_cat = fetch_customers_by_category(conn)
-    if df_cat is None:
-        print("[ERROR] Truy vấn khách theo category thất bại.")
-        return
+
+def render_category_report(df_cat: pd.DataFrame, out_dir: Path):
+    cat_html = out_dir / "sakila_customers_by_category.html"
     print_grouped(df_cat, "Category", ["CustomerID", "Name", "Email", "Active"])
     print(f"\nWriting HTML: {cat_html}")
     write_customers_by_category_html(df_cat, cat_html)
-    export_excel(df_cat, tests_dir / "sakila_customers_by_category.xlsx", "CustomersByCategory")
+    export_excel(df_cat, out_dir / "sakila_customers_by_category.xlsx", "CustomersByCategory")
 
-    print("\nComputing interest features and clustering ...")
-    features = fetch_interest_features(conn)
-    if features is None:
-        print("[ERROR] Truy vấn đặc trưng quan tâm thất bại.")
-        return
+
+def render_cluster_report(features: pd.DataFrame, out_dir: Path):
+    cluster_html = out_dir / "sakila_customers_by_interest_clusters.html"
+    print("\nClustering interest features ...")
     clustered = cluster_customers(features, k=4)
     print("Cluster sizes:")
     print(clustered.groupby("Cluster").size().to_string())
     print(f"\nWriting HTML: {cluster_html}")
     write_clusters_html(clustered, cluster_html)
-    export_excel(clustered, tests_dir / "sakila_customers_clusters.xlsx", "Clusters")
+    export_excel(clustered, out_dir / "sakila_customers_clusters.xlsx", "Clusters")
 
-    open_on_server("sakila_customers_by_category.html")
+
+RENDERERS = {
+    "film": render_film_report,
+    "category": render_category_report,
+    "interest": render_cluster_report,
+}
+
+# name -> files written by its renderer
+REPORT_FILES = {
+    "film": ["sakila_customers_by_film.html", "sakila_customers_by_film.xlsx"],
+    "category": ["sakila_customers_by_category.html", "sakila_customers_by_category.xlsx"],
+    "interest": ["sakila_customers_by_interest_clusters.html", "sakila_customers_clusters.xlsx"],
+}
+
+
+def make_report_server(conn: CachedConnector, out_dir: Path, port: int = 8001) -> ReportServer:
+    """Serve the reports in `out_dir`, rebuilding one on request once it is older than the query cache TTL."""
+    server = ReportServer(out_dir, port=port)
+
+    def regenerate(name):
+        df = FETCHERS[name][0](conn)
+        if df is None:
+            raise RuntimeError(FETCHERS[name][1])
+        RENDERERS[name](df, out_dir)
+
+    for name, files in REPORT_FILES.items():
+        server.register(files, lambda name=name: regenerate(name), max_age=conn.ttl)
+    return server
+
+
+def _segment_watermark(db: PooledConnector) -> str:
+    df = db.queryDataset(SEGMENT_WATERMARK_SQL)
+    if df is None:
+        raise RuntimeError("[ERROR] Truy vấn watermark phân khúc khách hàng thất bại.")
+    return str(df["Watermark"].iloc[0])
+
+
+def segment_customers_streaming(db: PooledConnector, k: int = 4, chunk_size: int = 50_000,
+                                model_path: Path = SEGMENT_MODEL_PATH) -> dict:
+    """Cluster every customer with mini-batch KMeans over streamed feature chunks.
+
+    Nothing is loaded whole: the features are read in `chunk_size` row chunks
+    (scaler pass, training pass, assignment pass) and the labels are written
+    to the customer_segment table batch by batch. The scaler and centroids
+    then replace the saved segmentation model (with a fresh watermark), so
+    later incremental runs keep the same cluster numbering.
+    """
+    refresh_interest_features(db)
+    watermark = _segment_watermark(db)
+    stats = stream_segmentation(db, INTEREST_FEATURES_SCAN_SQL, "CustomerID", INTEREST_FEATURE_COLUMNS,
+                                label_table="customer_segment", k=k, chunk_size=chunk_size)
+    SegmentationModel.from_streaming(INTEREST_FEATURE_COLUMNS, stats["scaler"], stats["model"], stats["inertia"],
+                                     stats["rows"], watermark).save(model_path)
+    return stats
+
+
+def update_customer_segments(db: PooledConnector, k: int = 4, model_path: Path = SEGMENT_MODEL_PATH) -> dict:
+    """Label only the customers changed since the last run and upsert them into customer_segment.
+
+    The saved segmentation model keeps the watermark (latest customer last_update /
+    feature summary UpdatedAt) of its previous run; customers touched after it are
+    assigned to the nearest saved centroid. Every customer is re-read, the model
+    refitted and every label rewritten only when there is no model yet (or no
+    watermark) or the drift monitor fires.
+    """
+    refresh_interest_features(db)
+    watermark = _segment_watermark(db)
+    model = SegmentationModel.load(model_path)
+    since = model.watermark if model is not None else None
+    changed = db.queryDataset(CHANGED_INTEREST_FEATURES_SQL, (since, since)) if since is not None else None
+    if changed is None and since is not None:
+        raise RuntimeError("[ERROR] Truy vấn khách hàng thay đổi thất bại.")
+
+    def load_all():
+        df = fetch_interest_features(db)
+        if df is None:
+            raise RuntimeError(FETCHERS["interest"][1])
+        return df
+
+    model, rows, labels, refitted = update_segments(model_path, changed, load_all, INTEREST_FEATURE_COLUMNS, k,
+                                                    watermark=watermark)
+    if len(rows):
+        out = pd.DataFrame({"CustomerID": rows["CustomerID"].to_numpy(), "Cluster": labels.astype(int)})
+        with db.connection() as write_conn:
+            ensure_label_table(write_conn, "customer_segment", "CustomerID")
+            bulk_upsert(write_conn, "customer_segment", out, columns=["CustomerID", "Cluster"],
+                        update_columns=["Cluster"], verbose=False)
+    print(f"{len(rows)} customers {'segmented (full refit)' if refitted else 'assigned incrementally'}"
+          f" into customer_segment; watermark {watermark}")
+    return {"rows": len(rows), "refitted": refitted, "watermark": watermark, "model": model}
+
+
+def main(concurrent: bool = True, serve: bool = True, streaming: bool = False, incremental: bool = False):
+    conn = CachedConnector(PooledConnector(database="sakila"), ttl=600,
+                           cache_dir=Path(__file__).parent / ".query_cache")
+    if conn.connect() is None:
+        print("[ERROR] Không thể kết nối tới MySQL 'sakila'. Kiểm tra connectors/mysql_pool.py")
+        return
+
+    tests_dir = Path(__file__).parent
+
+    if streaming:
+        # multi-million customer bases: segment in the database instead of building the cluster report
+        print("Segmenting customers (streaming mini-batch KMeans) ...")
+        segment_customers_streaming(conn.connector)
+        names = [name for name in FETCHERS if name != "interest"]
+    elif incremental:
+        # only customers changed since the last run get a (nearest-centroid) segment
+        print("Updating customer segments incrementally ...")
+        update_customer_segments(conn.connector)
+        names = [name for name in FETCHERS if name != "interest"]
+    else:
+        names = None
+
+    print("Fetching customers by film, by category and interest features ...")
+    for name, df in iter_fetch_results(conn, concurrent=concurrent, names=names):
+        if df is None:
+            print(FETCHERS[name][1])
+            return
+        RENDERERS[name](df, tests_dir)
+
+    if not serve:
+        open_on_server("sakila_customers_by_category.html")
+        return
+    server = make_report_server(conn, tests_dir)
+    try:
+        server.bind()
+    except OSError as e:
+        # port taken (e.g. an external preview server is already running): just open the page there
+        print(f"[WARN] Report server not started on port {server.port}: {e}")
+        open_on_server("sakila_customers_by_category.html")
+        return
+    open_on_server("sakila_customers_by_category.html", server)
+    server.serve_forever()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,176 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from bonus.clustering import fit_kmeans
+
+# Bump when the saved layout changes; older files are then ignored and the model is refitted.
+SEGMENT_MODEL_VERSION = 1
+MAX_CENTROID_SHIFT = 0.5
+MAX_INERTIA_RATIO = 1.25
+# fewer rows than this per cluster are too noisy to measure a shift (or overall, an inertia ratio)
+MIN_DRIFT_ROWS = 30
+
+
+class SegmentationModel:
+    """A fitted customer segmentation: scaler (mean/scale) plus KMeans centroids.
+
+    assign_clusters() labels new or changed rows by nearest centroid without
+    retraining. Every assigned row also feeds a drift monitor: a running mean
+    per cluster and the running mean squared distance, compared with the
+    values seen at fit time by drift().
+    """
+    def __init__(self, columns, mean, scale, centroids, baseline_inertia: float, trained_rows: int,
+                 watermark=None, assigned_sum=None, assigned_count=None, assigned_sq_dist: float = 0.0):
+        self.columns = list(columns)
+        self.mean = np.asarray(mean, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        self.centroids = np.asarray(centroids, dtype=float)
+        self.baseline_inertia = float(baseline_inertia)
+        self.trained_rows = int(trained_rows)
+        self.watermark = watermark
+        k, d = self.centroids.shape
+        self.assigned_sum = np.zeros((k, d)) if assigned_sum is None else np.asarray(assigned_sum, dtype=float)
+        self.assigned_count = np.zeros(k) if assigned_count is None else np.asarray(assigned_count, dtype=float)
+        self.assigned_sq_dist = float(assigned_sq_dist)
+
+    @classmethod
+    def fit(cls, df: pd.DataFrame, columns, k: int = 4, random_state: int = 42, watermark=None):
+        values = df[list(columns)].fillna(0).to_numpy(dtype=float)
+        mean = values.mean(axis=0)
+        scale = values.std(axis=0)
+        scale[scale == 0] = 1.0
+        result = fit_kmeans((values - mean) / scale, k, n_init=10, random_state=random_state)
+        return cls(columns, mean, scale, result.centroids, result.inertia / len(values), len(values), watermark)
+
+    @classmethod
+    def from_streaming(cls, columns, scaler, kmeans, inertia: float, rows: int, watermark=None):
+        """Wrap a StandardScaler + (MiniBatch)KMeans pair, e.g. from streaming_kmeans, keeping its cluster IDs."""
+        return cls(columns, scaler.mean_, scaler.scale_, kmeans.cluster_centers_, inertia / max(rows, 1), rows,
+                   watermark)
+
+    @property
+    def n_clusters(self) -> int:
+        return len(self.centroids)
+
+    def matches(self, columns, k: int) -> bool:
+        return self.columns == list(columns) and self.n_clusters == k
+
+    def transform(self, rows: pd.DataFrame) -> np.ndarray:
+        return (rows[self.columns].fillna(0).to_numpy(dtype=float) - self.mean) / self.scale
+
+    def assign_clusters(self, new_rows: pd.DataFrame, track: bool = True) -> np.ndarray:
+        """Nearest-centroid label for every row of `new_rows` (no retraining)."""
+        if len(new_rows) == 0:
+            return np.empty(0, dtype=int)
+        X = self.transform(new_rows)
+        d2 = ((X[:, None, :] - self.centroids[None, :, :]) ** 2).sum(axis=2)
+        labels = d2.argmin(axis=1)
+        if track:
+            np.add.at(self.assigned_sum, labels, X)
+            self.assigned_count += np.bincount(labels, minlength=self.n_clusters)
+            self.assigned_sq_dist += float(d2[np.arange(len(X)), labels].sum())
+        return labels
+
+    def _statistics(self, total, count, sq_dist: float) -> dict:
+        assigned = int(count.sum())
+        radius = np.sqrt(self.baseline_inertia) if self.baseline_inertia > 0 else 1.0
+        used = count >= MIN_DRIFT_ROWS
+        shift = 0.0
+        if used.any():
+            means = total[used] / count[used, None]
+            shift = float(np.sqrt(((means - self.centroids[used]) ** 2).sum(axis=1)).max() / radius)
+        measurable = assigned >= MIN_DRIFT_ROWS and self.baseline_inertia > 0
+        ratio = (sq_dist / assigned) / self.baseline_inertia if measurable else 1.0
+        return {"assigned": assigned, "centroid_shift": shift, "inertia_ratio": ratio}
+
+    def drift(self, rows: pd.DataFrame | None = None, max_shift: float = MAX_CENTROID_SHIFT,
+              max_inertia_ratio: float = MAX_INERTIA_RATIO) -> dict:
+        """Compare the rows assigned since the fit (or `rows`, if given) with the fit itself.
+
+        centroid_shift: largest distance between a centroid and the mean of
+        the rows assigned to it, in units of the typical cluster radius.
+        inertia_ratio: mean squared distance of those rows / the same at fit time.
+        Both stay neutral (0 and 1) until MIN_DRIFT_ROWS rows have accumulated.
+        """
+        if rows is None:
+            stats = self._statistics(self.assigned_sum, self.assigned_count, self.assigned_sq_dist)
+        else:
+            probe = SegmentationModel(self.columns, self.mean, self.scale, self.centroids,
+                                      self.baseline_inertia, self.trained_rows)
+            probe.assign_clusters(rows)
+            stats = probe._statistics(probe.assigned_sum, probe.assigned_count, probe.assigned_sq_dist)
+        stats["drifted"] = stats["centroid_shift"] > max_shift or stats["inertia_ratio"] > max_inertia_ratio
+        return stats
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            "version": SEGMENT_MODEL_VERSION, "saved_at": time.time(), "columns": self.columns,
+            "mean": self.mean.tolist(), "scale": self.scale.tolist(), "centroids": self.centroids.tolist(),
+            "baseline_inertia": self.baseline_inertia, "trained_rows": self.trained_rows,
+            "watermark": self.watermark, "assigned_sum": self.assigned_sum.tolist(),
+            "assigned_count": self.assigned_count.tolist(), "assigned_sq_dist": self.assigned_sq_dist,
+        }
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Return the saved model, or None if there is none (or it is from another version)."""
+        try:
+            state = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if state.get("version") != SEGMENT_MODEL_VERSION:
+            return None
+        return cls(state["columns"], state["mean"], state["scale"], state["centroids"], state["baseline_inertia"],
+                   state["trained_rows"], state.get("watermark"), state["assigned_sum"], state["assigned_count"],
+                   state["assigned_sq_dist"])
+
+
+def update_segments(model_path, changed_rows, load_all_rows, columns, k: int = 4, watermark=None,
+                    max_shift: float = MAX_CENTROID_SHIFT, max_inertia_ratio: float = MAX_INERTIA_RATIO):
+    """Label rows with the saved model; refit on `load_all_rows()` only when needed.
+
+    With `changed_rows`, only those are labelled and they feed the drift
+    monitor; with changed_rows=None every row is labelled and checked. A
+    full refit happens when there is no usable saved model or when drift
+    crosses a threshold; it renumbers the clusters, so `rows` is then every
+    row and the caller must rewrite all stored labels. A refit keeps only the
+    given `watermark` (None otherwise), never the previous model's.
+    Returns (model, rows, labels, refitted).
+    """
+    model = SegmentationModel.load(model_path)
+    if model is not None and not model.matches(columns, k):
+        model = None
+    previous_watermark = model.watermark if model is not None else None
+    rows = None
+    if model is not None:
+        if changed_rows is None:
+            rows = load_all_rows()
+            drift = model.drift(rows, max_shift, max_inertia_ratio)
+            labels = model.assign_clusters(rows, track=False)
+        else:
+            rows = changed_rows
+            labels = model.assign_clusters(rows)
+            drift = model.drift(None, max_shift, max_inertia_ratio)
+        print(f"Segmentation drift: {drift['assigned']} rows checked, "
+              f"centroid shift {drift['centroid_shift']:.2f}, inertia ratio {drift['inertia_ratio']:.2f}")
+        if drift["drifted"]:
+            print("Drift threshold crossed, refitting the segmentation.")
+            model = None
+    refitted = model is None
+    if refitted:
+        rows = rows if changed_rows is None and rows is not None else load_all_rows()
+        model = SegmentationModel.fit(rows, columns, k)
+        labels = model.assign_clusters(rows, track=False)
+    model.watermark = watermark if watermark is not None or refitted else previous_watermark
+    model.save(model_path)
+    return model, rows, labels, refitted
@@ -0,0 +1,105 @@
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+
+from connectors.bulk_load import bulk_upsert
+from connectors.paging import iter_query_chunks, quote_identifier
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+def iter_feature_chunks(db, sql: str, params=None, chunk_size: int = DEFAULT_CHUNK_ROWS):
+    """Yield DataFrame chunks of a query result read through one streaming cursor."""
+    with db.connection() as conn:
+        for columns, rows in iter_query_chunks(conn, sql, params, chunk_size):
+            yield pd.DataFrame(rows, columns=columns)
+
+
+def _features(chunk: pd.DataFrame, columns) -> np.ndarray:
+    return chunk[list(columns)].fillna(0).to_numpy(dtype=float)
+
+
+def fit_streaming(db, sql: str, columns, k: int = 4, params=None, chunk_size: int = DEFAULT_CHUNK_ROWS,
+                  epochs: int = 1, random_state: int = 42) -> tuple[StandardScaler, MiniBatchKMeans]:
+    """Fit a StandardScaler and a MiniBatchKMeans without ever loading the whole feature table.
+
+    Pass 1 streams the rows into StandardScaler.partial_fit (running mean and
+    variance); then `epochs` passes feed each scaled chunk to
+    MiniBatchKMeans.partial_fit. Memory is bounded by `chunk_size` rows.
+    """
+    scaler = StandardScaler()
+    for chunk in iter_feature_chunks(db, sql, params, chunk_size):
+        scaler.partial_fit(_features(chunk, columns))
+    if not hasattr(scaler, "mean_"):
+        raise ValueError("The feature query returned no rows")
+
+    model = MiniBatchKMeans(n_clusters=k, random_state=random_state, batch_size=min(chunk_size, 4096), n_init=3)
+    carry = None
+    for _ in range(epochs):
+        for chunk in iter_feature_chunks(db, sql, params, chunk_size):
+            X = scaler.transform(_features(chunk, columns))
+            if carry is not None:
+                X = np.vstack([carry, X])
+                carry = None
+            if len(X) < k and not hasattr(model, "cluster_centers_"):
+                # the first partial_fit needs at least k rows to initialise the centers
+                carry = X
+                continue
+            model.partial_fit(X)
+    if not hasattr(model, "cluster_centers_"):
+        raise ValueError(f"Not enough rows to fit {k} clusters")
+    return scaler, model
+
+
+def ensure_label_table(conn, table: str, key: str):
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {quote_identifier(table)} ("
+                   f"{quote_identifier(key)} BIGINT NOT NULL PRIMARY KEY, "
+                   f"`Cluster` INT NOT NULL, "
+                   f"`UpdatedAt` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP)")
+    conn.commit()
+    cursor.close()
+
+
+def assign_streaming(db, sql: str, key: str, columns, scaler, model, label_table: str, params=None,
+                     chunk_size: int = DEFAULT_CHUNK_ROWS) -> dict:
+    """Stream the rows again, predict their cluster and upsert (key, Cluster) into `label_table` chunk by chunk.
+
+    stats["inertia"] is the total squared distance of the rows to their centroid.
+
+    Reading and writing use two pooled connections, since the streaming
+    cursor keeps its connection busy until the last row is read.
+    """
+    stats = {"rows": 0, "chunks": 0, "inertia": 0.0, "cluster_sizes": np.zeros(model.n_clusters, dtype=np.int64)}
+    with db.connection() as write_conn:
+        ensure_label_table(write_conn, label_table, key)
+        for chunk in iter_feature_chunks(db, sql, params, chunk_size):
+            distances = model.transform(scaler.transform(_features(chunk, columns)))
+            labels = distances.argmin(axis=1)
+            stats["inertia"] += float((distances[np.arange(len(labels)), labels] ** 2).sum())
+            out = pd.DataFrame({key: chunk[key].to_numpy(), "Cluster": labels.astype(int)})
+            bulk_upsert(write_conn, label_table, out, columns=[key, "Cluster"], update_columns=["Cluster"],
+                        verbose=False)
+            stats["rows"] += len(out)
+            stats["chunks"] += 1
+            stats["cluster_sizes"] += np.bincount(labels, minlength=model.n_clusters)
+    return stats
+
+
+def stream_segmentation(db, sql: str, key: str, columns, label_table: str, k: int = 4, params=None,
+                        chunk_size: int = DEFAULT_CHUNK_ROWS, epochs: int = 1, random_state: int = 42,
+                        verbose: bool = True) -> dict:
+    """Fit (scaler + mini-batch KMeans) and write every row's cluster back, all in bounded memory."""
+    started = time.perf_counter()
+    scaler, model = fit_streaming(db, sql, columns, k, params, chunk_size, epochs, random_state)
+    stats = assign_streaming(db, sql, key, columns, scaler, model, label_table, params, chunk_size)
+    stats["seconds"] = time.perf_counter() - started
+    stats["scaler"] = scaler
+    stats["model"] = model
+    if verbose:
+        print(f"{stats['rows']} rows segmented into {k} clusters ({label_table}) in {stats['chunks']} chunks, "
+              f"{stats['seconds']:.2f}s; sizes: {stats['cluster_sizes'].tolist()}")
+    return stats
@@ -1,10 +1,13 @@
-from ML_Excercises.project_retail.connectors.connector import Connector
+from connectors.mysql_pool import PooledConnector
+from connectors.query_cache import CachedConnector
+from bonus.excel_export import column_widths, write_excel
+from bonus.html_render import render_rows
+from bonus.kmeans_sweep import kmeans_sweep
+from bonus.clustering import fit_kmeans
 import argparse
-import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.cluster import KMeans
 
 # CLI: default is web-only; show plots only when --plots is provided
 parser = argparse.ArgumentParser(description="Retail clustering and export")
@@ -12,7 +15,8 @@ parser.add_argument("--plots", action="store_true", help="Show plots (histogram,
 args = parser.parse_args()
 SHOW_PLOTS = args.plots
 
-conn=Connector(database="salesdatabase")
+# cache query results so repeated report runs do not hit MySQL again
+conn=CachedConnector(PooledConnector(database="salesdatabase"), ttl=600, cache_dir=".query_cache")
 conn.connect()
 sql="select * from customer"
 df=conn.queryDataset(sql)
@@ -46,15 +50,16 @@ if SHOW_PLOTS:
 
 def elbowMethod(df, columnsForElbow):
     X = df.loc[:, columnsForElbow].values
-    inertia = []
-    for n in range(1, 11):
-        model = KMeans(n_clusters=n, init='k-means++', max_iter=500, random_state=42)
-        model.fit(X)
-        inertia.append(model.inertia_)
+    # quét k song song, warm-start từ centroid trước đó, dừng sớm khi đã qua điểm gãy
+    scores, knee = kmeans_sweep(X, k_min=1, k_max=10, max_iter=500)
+    print(scores.to_string(index=False))
+    print("Elbow (knee) at k =", knee)
 
     plt.figure(figsize=(15, 6))          # đừng tái dùng figure(1)
-    plt.plot(np.arange(1, 11), inertia, 'o')
-    plt.plot(np.arange(1, 11), inertia, '-.', alpha=0.5)
+    plt.plot(scores['k'], scores['inertia'], 'o')
+    plt.plot(scores['k'], scores['inertia'], '-.', alpha=0.5)
+    plt.axvline(knee, color='gray', linestyle=':', label=f'knee k={knee}')
+    plt.legend()
     plt.xlabel('Number of Clusters')
     plt.ylabel('Cluster sum of squared distances')
     plt.title('Elbow Method')
@@ -65,17 +70,9 @@ if SHOW_PLOTS:
     elbowMethod(df2, ['Age', 'Spending Score'])
 
 def runKMeans(X, cluster):
-    model = KMeans(
-        n_clusters=cluster,
-        init='k-means++',
-        max_iter=500,
-        random_state=42
-    )
-    model.fit(X)
-    labels = model.labels_
-    centroids = model.cluster_centers_
-    y_kmeans = model.fit_predict(X)
-    return y_kmeans, centroids, labels
+    # fit 1 lần duy nhất; model được cache theo fingerprint dữ liệu nên chạy lại không phải train
+    result = fit_kmeans(X, cluster, init='k-means++', max_iter=500, random_state=42)
+    return result.labels, result.centroids, result.labels
 
 # Chọn 2 trục để vẽ: Age & Spending Score
 columns = ['Age', 'Spending Score']
@@ -119,18 +116,20 @@ if SHOW_PLOTS:
     )
 
 import plotly.express as px
-from sklearn.preprocessing import StandardScaler
+from bonus.segmentation import update_segments
+from pathlib import Path
 
 # 1) Chọn 3 biến để vẽ 3D
 columns = ['Age', 'Annual Income', 'Spending Score']
 
-# 2) (khuyến nghị) scale trước khi KMeans
-X_raw = df2.loc[:, columns].values
-X = StandardScaler().fit_transform(X_raw)
-
-# 3) Set k = 5 và train lại
+# 2) + 3) k = 5 trên dữ liệu đã scale. Model (scaler + centroids) được lưu lại: lần chạy sau chỉ gán
+#    cluster theo centroid gần nhất, chỉ train lại khi dữ liệu bị drift (centroid lệch / inertia tăng)
 cluster = 5
-y_kmeans, centroids, labels = runKMeans(X, cluster)
+segment_model_path = Path(__file__).parent / ".cache" / "salesdatabase_segments.json"
+segment_model, _, labels, _ = update_segments(segment_model_path, None, lambda: df2,
+                                              columns, cluster)
+X = segment_model.transform(df2)
+y_kmeans, centroids = labels, segment_model.centroids
 df2['cluster'] = labels.astype(int)
 
 # 4) Vẽ 3D với Plotly
@@ -148,6 +147,7 @@ if SHOW_PLOTS:
     visualize3DKmeans(df2, columns, df2.columns, cluster)
 
 # ====== ADD BELOW THIS LINE (after df2['cluster'] is created) ======
+import html
 from pathlib import Path
 
 # (A) Lấy ALL customers từ MySQL
@@ -180,27 +180,19 @@ def print_customers_by_cluster(merged: pd.DataFrame, cluster_col: str = "cluster
         print(group.drop(columns=[cluster_col]).to_string(index=False))
 
 # (2) Xuất Excel: sheet tổng + mỗi cluster một sheet
+# Độ rộng cột chỉ tính 1 lần (trên mẫu), ghi từng dòng với constant_memory
 def export_clusters_to_excel(merged: pd.DataFrame,
                              out_path: str = "customers_by_cluster.xlsx",
                              cluster_col: str = "cluster") -> str:
     out_path = str(Path(out_path).resolve())
-    with pd.ExcelWriter(out_path, engine="xlsxwriter") as writer:
-        merged.sort_values(cluster_col).to_excel(writer, sheet_name="All_Customers", index=False)
+    widths = column_widths(merged)
+
+    def sheets():
+        yield "All_Customers", merged.sort_values(cluster_col)
         for k, group in merged.groupby(cluster_col):
-            sheet_name = f"Cluster_{k}"
-            group.drop(columns=[cluster_col]).to_excel(writer, sheet_name=sheet_name, index=False)
-
-        # Định dạng nhẹ cho đẹp
-        workbook = writer.book
-        header_fmt = workbook.add_format({"bold": True, "bg_color": "#F1F5F9", "border": 1})
-        cell_fmt = workbook.add_format({"border": 1})
-        for name, ws in writer.sheets.items():
-            df_preview = merged if name == "All_Customers" else merged.drop(columns=[cluster_col])
-            for col_idx, col in enumerate(df_preview.columns):
-                width = max(10, min(35, int(df_preview[col].astype(str).str.len().quantile(0.9)) + 2))
-                ws.set_column(col_idx, col_idx, width, cell_fmt)
-            ws.set_row(0, 20, header_fmt)
-    return out_path
+            yield f"Cluster_{k}", group.drop(columns=[cluster_col])
+
+    return write_excel(out_path, sheets(), widths)
 
 # (2') Tạo file HTML Bootstrap đẹp, có tab theo cluster + search
 def write_customers_html(merged: pd.DataFrame,
@@ -254,29 +246,10 @@ def write_customers_html(merged: pd.DataFrame,
 <div class="col-md-6"><input id="search" class="form-control search-input" placeholder="Search current cluster..."></div></div>
 """
 
-    # Tab panes with tables
-    panes = ['<div class="tab-content">']
-    for i, k in enumerate(clusters):
-        active = "show active" if i == 0 else ""
-        rows = merged.loc[merged[cluster_col] == k, cols_no_cluster]
-        table_head = "<tr>" + "".join([f"<th>{c}</th>" for c in rows.columns]) + "</tr>"
-        body_rows = []
-        for _, r in rows.iterrows():
-            tds = "".join([f"<td>{r[c]}</td>" for c in rows.columns])
-            body_rows.append(f"<tr>{tds}</tr>")
-        table_body = "\n".join(body_rows)
-        panes.append(f"""
-<div class="tab-pane fade {active}" id="tab-{k}">
-  <div class="card"><div class="card-body">
-    <div class="table-responsive" style="max-height:70vh;">
-      <table class="table table-sm table-hover align-middle">
-        <thead>{table_head}</thead>
-        <tbody>{table_body}</tbody>
-      </table>
-    </div>
-  </div></div>
-</div>""")
-    panes.append("</div>")  # end tab-content
+    # Tab panes with tables: mỗi dòng <tr> được render 1 lần theo cột (vectorized, có escape)
+    table_head = "<tr>" + "".join([f"<th>{html.escape(str(c))}</th>" for c in cols_no_cluster]) + "</tr>"
+    body_rows = render_rows(merged, cols_no_cluster) + "\n"
+    positions = merged.groupby(cluster_col).indices
 
     # Footer + JS
     tail = """
@@ -293,8 +266,27 @@ searchInput.addEventListener('input', function(){
 </script>
 </body></html>
 """
-    html = head + tabs_html + search_html + "\n".join(panes) + tail
-    Path(out_path).write_text(html, encoding="utf-8")
+    # Ghi từng phần ra file thay vì ghép một chuỗi HTML khổng lồ
+    with open(out_path, "w", encoding="utf-8") as fh:
+        fh.write(head + tabs_html + search_html)
+        fh.write('<div class="tab-content">')
+        for i, k in enumerate(clusters):
+            active = "show active" if i == 0 else ""
+            fh.write(f"""
+<div class="tab-pane fade {active}" id="tab-{k}">
+  <div class="card"><div class="card-body">
+    <div class="table-responsive" style="max-height:70vh;">
+      <table class="table table-sm table-hover align-middle">
+        <thead>{table_head}</thead>
+        <tbody>""")
+            fh.writelines(body_rows.iloc[positions[k]])
+            fh.write("""</tbody>
+      </table>
+    </div>
+  </div></div>
+</div>""")
+        fh.write("\n</div>")  # end tab-content
+        fh.write(tail)
     return out_path
 
 # ===== Run: lấy dữ liệu, merge, in console, xuất excel & html =====
@@ -315,14 +307,31 @@ print("✅ HTML saved to:", html_path, "\n👉 Open this file in your browser.")
 # ====== END ADD ======
 
 import webbrowser, os, socket
-# Ưu tiên mở qua server nếu sẵn có, fallback sang file:// nếu không có server
-web_url = f"http://127.0.0.1:8000/{Path(html_path).name}"
-try:
-    with socket.create_connection(("127.0.0.1", 8000), timeout=0.5):
-        webbrowser.open(web_url)
-        print("🌐 Opened in browser:", web_url)
-except OSError:
-    webbrowser.open('file://' + html_path.replace('\\','/'))
-    print("🌐 Opened local file:", html_path)
+from bonus.report_server import ReportServer
 
+# Server nội bộ: gzip + ETag, tự tạo lại báo cáo khi cache truy vấn (TTL) đã hết hạn
+def regenerate_reports():
+    merged = merge_customers_with_cluster(fetch_all_customers(conn), df_clusters)
+    export_clusters_to_excel(merged, excel_path)
+    write_customers_html(merged, html_path)
 
+server = ReportServer(Path(html_path).parent, port=8000)
+server.register([Path(html_path).name, Path(excel_path).name], regenerate_reports, max_age=conn.ttl)
+web_url = server.url(Path(html_path).name)
+try:
+    server.bind()
+except OSError:
+    server = None
+if server is not None:
+    webbrowser.open(web_url)
+    print("🌐 Opened in browser:", web_url)
+    server.serve_forever()
+else:
+    # Cổng 8000 đã có server khác: mở qua server đó nếu được, fallback sang file://
+    try:
+        with socket.create_connection(("127.0.0.1", 8000), timeout=0.5):
+            webbrowser.open(web_url)
+            print("🌐 Opened in browser:", web_url)
+    except OSError:
+        webbrowser.open('file://' + html_path.replace('\\','/'))
+        print("🌐 Opened local file:", html_path)
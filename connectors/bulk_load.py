@@ -0,0 +1,116 @@
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from connectors.paging import quote_identifier
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _iter_batches(data, columns, batch_size):
+    """Yield (columns, list of row tuples) batches from a DataFrame, CSV path or row sequence."""
+    if isinstance(data, (str, Path)):
+        for chunk in pd.read_csv(data, chunksize=batch_size, usecols=columns):
+            yield from _iter_batches(chunk, columns, batch_size)
+        return
+    if isinstance(data, pd.DataFrame):
+        frame = data[columns] if columns else data
+        # NaN/NaT become NULL
+        frame = frame.astype(object).where(frame.notna(), None)
+        cols = list(frame.columns)
+        rows = list(frame.itertuples(index=False, name=None))
+    else:
+        if not columns:
+            raise ValueError("columns is required when data is a sequence of rows")
+        cols = list(columns)
+        rows = list(data)
+    for start in range(0, len(rows), batch_size):
+        yield cols, rows[start:start + batch_size]
+
+
+def build_upsert_sql(table: str, columns, n_rows: int, update_columns=None) -> str:
+    """Build one multi-row INSERT ... ON DUPLICATE KEY UPDATE statement for `n_rows` rows."""
+    cols = [quote_identifier(c) for c in columns]
+    row = "(" + ", ".join(["%s"] * len(cols)) + ")"
+    sql = f"INSERT INTO {quote_identifier(table)} ({', '.join(cols)}) VALUES " + ", ".join([row] * n_rows)
+    updates = [quote_identifier(c) for c in (update_columns if update_columns is not None else columns)]
+    if updates:
+        sql += " ON DUPLICATE KEY UPDATE " + ", ".join(f"{c}=VALUES({c})" for c in updates)
+    return sql
+
+
+def bulk_upsert(conn, table: str, data, columns=None, update_columns=None,
+                batch_size: int = DEFAULT_BATCH_SIZE, verbose: bool = True) -> dict:
+    """Insert or update many rows of `table` in one transaction.
+
+    `data` may be a DataFrame, a CSV path (read in chunks) or a sequence of
+    row tuples together with `columns`. Rows are sent as multi-row
+    INSERT ... ON DUPLICATE KEY UPDATE statements of `batch_size` rows; rows
+    hitting an existing unique key update `update_columns` (default: all).
+    Returns {"rows", "affected", "batches", "seconds", "rows_per_sec"}.
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    columns = list(columns) if columns is not None else None
+    stats = {"rows": 0, "affected": 0, "batches": 0}
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    try:
+        sql_cache = {}
+        for cols, rows in _iter_batches(data, columns, batch_size):
+            if not rows:
+                continue
+            key = (tuple(cols), len(rows))
+            if key not in sql_cache:
+                sql_cache[key] = build_upsert_sql(table, cols, len(rows), update_columns)
+            cursor.execute(sql_cache[key], [v for r in rows for v in r])
+            stats["rows"] += len(rows)
+            stats["affected"] += max(cursor.rowcount, 0)
+            stats["batches"] += 1
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    stats["seconds"] = time.perf_counter() - started
+    stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] > 0 else float("inf")
+    if verbose:
+        print(f"{stats['rows']} rows upserted into {table} in {stats['batches']} batches, "
+              f"{stats['seconds']:.2f}s ({stats['rows_per_sec']:.0f} rows/s)")
+    return stats
+
+
+def load_data_infile(conn, table: str, csv_path, columns=None, replace: bool = True,
+                     delimiter: str = ",", line_terminator: str = "\n", skip_header: bool = True,
+                     verbose: bool = True) -> dict:
+    """Fast path: stream a CSV with LOAD DATA LOCAL INFILE.
+
+    The connection must be opened with allow_local_infile=True (for example
+    PooledConnector(..., allow_local_infile=True)). With `replace` rows that hit
+    an existing unique key replace it; otherwise they are skipped.
+    """
+    csv_path = Path(csv_path).resolve()
+    if columns is None:
+        columns = list(pd.read_csv(csv_path, nrows=0).columns)
+    mode = "REPLACE" if replace else "IGNORE"
+    sql = (f"LOAD DATA LOCAL INFILE %s {mode} INTO TABLE {quote_identifier(table)} "
+           f"CHARACTER SET utf8mb4 FIELDS TERMINATED BY %s OPTIONALLY ENCLOSED BY '\"' "
+           f"LINES TERMINATED BY %s {'IGNORE 1 LINES ' if skip_header else ''}"
+           f"({', '.join(quote_identifier(c) for c in columns)})")
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, (str(csv_path), delimiter, line_terminator))
+        affected = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    seconds = time.perf_counter() - started
+    if verbose:
+        print(f"LOAD DATA into {table}: {affected} rows affected in {seconds:.2f}s")
+    return {"affected": affected, "seconds": seconds}
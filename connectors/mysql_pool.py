@@ -0,0 +1,140 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+import pandas as pd
+from mysql.connector import pooling
+from mysql.connector.errors import PoolError
+
+DEFAULT_POOL_SIZE = 5
+
+# One pool per distinct configuration (credentials, pool size and extra connect options),
+# shared by every caller in the process that asks for the same one.
+_pools: dict[tuple, pooling.MySQLConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(server="localhost", port=3306, database=None, username="root", password="",
+             pool_size: int = DEFAULT_POOL_SIZE, **kwargs) -> pooling.MySQLConnectionPool:
+    """Return the shared connection pool for this configuration, creating it on first use.
+
+    Callers that differ in pool_size, password or connect options (e.g.
+    allow_local_infile=True) get their own pool rather than the first one made.
+    """
+    # repr: option values such as ssl settings may be unhashable
+    key = (server, port, database, username, password, pool_size,
+           tuple(sorted((name, repr(value)) for name, value in kwargs.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = pooling.MySQLConnectionPool(
+                pool_name=f"pool_{len(_pools)}",
+                pool_size=pool_size,
+                pool_reset_session=True,
+                host=server,
+                port=port,
+                database=database,
+                user=username,
+                password=password,
+                **kwargs)
+            _pools[key] = pool
+    return pool
+
+
+def acquire(pool: pooling.MySQLConnectionPool, timeout: float = 10.0):
+    """Borrow a healthy connection from `pool`.
+
+    Waits up to `timeout` seconds when every connection is in use, and pings
+    the connection before handing it out so a dropped link is reopened here
+    instead of failing the caller's first query.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            conn = pool.get_connection()
+            break
+        except PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+    try:
+        conn.ping(reconnect=True, attempts=2, delay=0)
+    except mysql.connector.Error:
+        conn.close()
+        raise
+    return conn
+
+
+class PooledConnector:
+    """Drop-in replacement for Connector that borrows connections from a shared pool.
+
+    Every queryDataset/execute call takes a connection from the pool and
+    gives it back when done, so no call pays for a new TCP/auth handshake.
+    """
+    def __init__(self, server="localhost", port=3306, database=None, username="root", password="123456",
+                 pool_size: int = DEFAULT_POOL_SIZE, **kwargs):
+        self.server = server
+        self.port = port
+        self.database = database
+        self.username = username
+        self.password = password
+        self.pool_size = pool_size
+        self.kwargs = kwargs
+        self.pool = None
+
+    def connect(self):
+        """Create (or reuse) the pool and check one connection; return None on failure."""
+        try:
+            self.pool = get_pool(self.server, self.port, self.database, self.username, self.password,
+                                 self.pool_size, **self.kwargs)
+            acquire(self.pool).close()
+            return self
+        except mysql.connector.Error as e:
+            print("Error connecting to MySQL:", e)
+            self.pool = None
+            return None
+
+    def get_connection(self):
+        """Borrow a raw pooled connection; call close() on it to give it back."""
+        if self.pool is None and self.connect() is None:
+            raise ConnectionError(f"Cannot connect to MySQL database '{self.database}'")
+        return acquire(self.pool)
+
+    @contextmanager
+    def connection(self):
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def queryDataset(self, sql, params=None):
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+                columns = cursor.column_names
+                cursor.close()
+            return pd.DataFrame(rows, columns=columns)
+        except (mysql.connector.Error, ConnectionError) as e:
+            print("Error querying MySQL:", e)
+            return None
+
+    def execute(self, sql, params=None, many=False) -> int:
+        """Run an INSERT/UPDATE/DELETE and commit; return the affected row count."""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                if many:
+                    cursor.executemany(sql, params)
+                else:
+                    cursor.execute(sql, params)
+                conn.commit()
+                return cursor.rowcount
+            except mysql.connector.Error:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
@@ -0,0 +1,101 @@
+import re
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def quote_identifier(name: str) -> str:
+    """Backtick-quote a table/column name after checking it is a plain identifier."""
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return f"`{name}`"
+
+
+def iter_keyset_pages(conn, table: str, key: str = "ID", columns=None, page_size: int = 1000,
+                      where: str | None = None, params=(), start_after=None):
+    """Yield pages (lists of row tuples) of `table` ordered by the primary key `key`.
+
+    Each page is fetched with `WHERE key > <last key seen> ORDER BY key LIMIT page_size`
+    (keyset/seek pagination), so every page is an index range scan no matter how
+    deep into the table it is, and no COUNT(*) is needed up front. Each page is
+    fetched in full with the connection's default (buffered) cursor, so memory is
+    bounded by `page_size` rows, not by the table. `where`/`params` add an extra
+    filter; `start_after` resumes after a key returned by an earlier page.
+    """
+    if page_size <= 0:
+        raise ValueError("page_size must be positive")
+    key_sql = quote_identifier(key)
+    if columns:
+        columns = list(columns)
+        if key.lower() not in [c.lower() for c in columns]:
+            columns.insert(0, key)
+        select = ", ".join(quote_identifier(c) for c in columns)
+    else:
+        select = "*"
+    base = f"SELECT {select} FROM {quote_identifier(table)}"
+    extra = f" AND ({where})" if where else ""
+
+    last_key = start_after
+    key_index = [c.lower() for c in columns].index(key.lower()) if columns else None
+    while True:
+        if last_key is None:
+            condition, values = (f" WHERE ({where})", tuple(params)) if where else ("", ())
+        else:
+            condition, values = f" WHERE {key_sql} > %s{extra}", (last_key, *params)
+        sql = f"{base}{condition} ORDER BY {key_sql} LIMIT %s"
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, (*values, page_size))
+            if key_index is None:
+                key_index = [c.lower() for c in cursor.column_names].index(key.lower())
+            page = cursor.fetchall()
+        finally:
+            cursor.close()
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        last_key = page[-1][key_index]
+
+
+def iter_keyset_rows(conn, table: str, key: str = "ID", columns=None, page_size: int = 1000,
+                     where: str | None = None, params=(), start_after=None):
+    """Like iter_keyset_pages, but yields one row at a time."""
+    for page in iter_keyset_pages(conn, table, key, columns, page_size, where, params, start_after):
+        yield from page
+
+
+def fetch_keyset_page(conn, table: str, key: str = "ID", columns=None, page_size: int = 1000,
+                      where: str | None = None, params=(), start_after=None) -> list:
+    """Return the single page that follows `start_after` (an empty list at the end)."""
+    return next(iter_keyset_pages(conn, table, key, columns, page_size, where, params, start_after), [])
+
+
+def iter_query_chunks(conn, sql: str, params=None, chunk_size: int = 10_000):
+    """Yield (column names, list of row tuples) for `sql`, `chunk_size` rows at a time.
+
+    The query runs once on an unbuffered (server-side) cursor and rows are
+    pulled with fetchmany, so only one chunk is held in memory however large
+    the result is. The connection cannot run other statements until the
+    generator is finished.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    cursor = conn.cursor(buffered=False)
+    pending = False
+    try:
+        cursor.execute(sql, params)
+        pending = True
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                pending = False
+                return
+            yield cursor.column_names, rows
+    finally:
+        if pending:
+            # stopped early: an unbuffered result must be drained before the cursor closes,
+            # chunk by chunk so the rest of a large result is never held at once
+            while cursor.fetchmany(chunk_size):
+                pass
+        cursor.close()
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+_LITERAL = re.compile(r"('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")")
+_FROM_CLAUSE = re.compile(
+    r"\bfrom\s+(?!\()(.+?)(?=\b(?:where|join|inner|left|right|cross|natural|on|group|order|having|limit|union)\b|\)|$)")
+_JOIN_TABLE = re.compile(r"\b(?:join|into|update)\s+([`\w.]+)")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace outside string literals and drop a trailing `;`.
+
+    Case is kept: aliases and quoted identifiers may differ only by case.
+    """
+    parts = _LITERAL.split(sql)
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r"\s+", " ", parts[i])
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def referenced_tables(sql: str) -> set[str]:
+    """Best-effort set of table names read or written by `sql`."""
+    # literals are blanked first, so lower-casing the rest only touches keywords and names
+    text = _LITERAL.sub("''", normalize_sql(sql)).lower()
+    names = []
+    for clause in _FROM_CLAUSE.findall(text):
+        names.extend(item.split()[0] for item in clause.split(",") if item.strip())
+    names.extend(_JOIN_TABLE.findall(text))
+    return {name.strip("`").split(".")[-1].strip("`") for name in names}
+
+
+class CachedConnector:
+    """Wrap a connector so identical queryDataset calls are served from a cache.
+
+    Results are kept in an in-memory LRU (`max_entries`) and, when `cache_dir`
+    is given, in Parquet files that survive between runs. Entries expire after
+    `ttl` seconds; invalidate(table) drops every entry that reads that table,
+    and execute() does so automatically for the tables it writes.
+    """
+    def __init__(self, connector, ttl: float = 300, max_entries: int = 128, cache_dir=None):
+        self.connector = connector
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._entries: OrderedDict[str, tuple[pd.DataFrame, float, set[str]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # everything else (connection, get_connection, pool, ...) goes to the wrapped connector
+        return getattr(self.connector, name)
+
+    def connect(self):
+        return self if self.connector.connect() is not None else None
+
+    @staticmethod
+    def cache_key(sql: str, params=None) -> str:
+        raw = normalize_sql(sql) + "\x00" + repr(params)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def queryDataset(self, sql, params=None, ttl: float | None = None):
+        key = self.cache_key(sql, params)
+        df = self._get(key)
+        if df is not None:
+            return df.copy()
+
+        df = self.connector.queryDataset(sql, params)
+        if df is None:
+            return None
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._put(key, df, expires_at, referenced_tables(sql), sql)
+        return df.copy()
+
+    def execute(self, sql, params=None, many=False) -> int:
+        rowcount = self.connector.execute(sql, params, many)
+        for table in referenced_tables(sql):
+            self.invalidate(table)
+        return rowcount
+
+    def is_fresh(self, sql, params=None) -> bool:
+        """True if `sql` would currently be answered from the cache."""
+        return self._get(self.cache_key(sql, params)) is not None
+
+    def invalidate(self, table: str | None = None):
+        """Drop cached results that read `table`, or everything if no table is given."""
+        table = table.lower() if table else None
+        with self._lock:
+            for key in [k for k, (_, _, tables) in self._entries.items() if table is None or table in tables]:
+                del self._entries[key]
+        if self.cache_dir is None or not self.cache_dir.exists():
+            return
+        for meta_file in self.cache_dir.glob("*.json"):
+            meta = self._read_meta(meta_file)
+            if meta is None or table is None or table in meta["tables"]:
+                self._remove_disk(meta_file.stem)
+
+    def _get(self, key: str) -> pd.DataFrame | None:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                df, expires_at, _ = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    return df
+                del self._entries[key]
+        if self.cache_dir is None:
+            return None
+        meta = self._read_meta(self.cache_dir / f"{key}.json")
+        if meta is None or meta["expires_at"] <= now:
+            return None
+        try:
+            df = pd.read_parquet(self.cache_dir / f"{key}.parquet")
+        except OSError:
+            return None
+        self._remember(key, df, meta["expires_at"], set(meta["tables"]))
+        return df
+
+    def _put(self, key, df, expires_at, tables, sql):
+        self._remember(key, df, expires_at, tables)
+        if self.cache_dir is None:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(self.cache_dir / f"{key}.parquet", index=False)
+            meta = {"sql": normalize_sql(sql), "expires_at": expires_at, "tables": sorted(tables)}
+            (self.cache_dir / f"{key}.json").write_text(json.dumps(meta), encoding="utf-8")
+        except Exception as e:
+            # some result types cannot be stored as Parquet; keep the memory entry only
+            print("[WARN] Query cache: cannot write disk entry:", e)
+            self._remove_disk(key)
+
+    def _remember(self, key, df, expires_at, tables):
+        with self._lock:
+            self._entries[key] = (df, expires_at, tables)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _read_meta(self, meta_file: Path) -> dict | None:
+        try:
+            return json.loads(meta_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _remove_disk(self, key: str):
+        for suffix in (".json", ".parquet"):
+            (self.cache_dir / f"{key}{suffix}").unlink(missing_ok=True)
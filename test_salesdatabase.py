@@ -4,6 +4,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.cluster import KMeans
+from bonus.clustering import fit_kmeans
 
 conn=Connector(database="salesdatabase")
 conn.connect()
@@ -56,17 +57,9 @@ def elbowMethod(df, columnsForElbow):
 elbowMethod(df2, ['Age', 'Spending Score'])
 
 def runKMeans(X, cluster):
-    model = KMeans(
-        n_clusters=cluster,
-        init='k-means++',
-        max_iter=500,
-        random_state=42
-    )
-    model.fit(X)
-    labels = model.labels_
-    centroids = model.cluster_centers_
-    y_kmeans = model.fit_predict(X)
-    return y_kmeans, centroids, labels
+    # fit 1 lần duy nhất; model được cache theo fingerprint dữ liệu nên chạy lại không phải train
+    result = fit_kmeans(X, cluster, init='k-means++', max_iter=500, random_state=42)
+    return result.labels, result.centroids, result.labels
 
 # Chọn 2 trục để vẽ: Age & Spending Score
 columns = ['Age', 'Spending Score']